@@ -0,0 +1 @@
+"""BookAudio: photographed book pages → OCR text → narrated MP3."""
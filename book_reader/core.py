@@ -0,0 +1,588 @@
+"""Shared OCR + TTS pipeline behind the book_reader_*_manual.py scripts.
+
+Everything except the text-to-speech call lives here; the TTS provider is
+passed in as a TTSBackend (see book_reader.elevenlabs_tts / speechify_tts).
+"""
+import os
+import re
+import json
+import hashlib
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Protocol
+
+# Pages are OCR'd in parallel by a thread pool, so keep each tesseract run
+# single-threaded. libgomp reads this when it is loaded, hence before the imports.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+import cv2
+import numpy as np
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+from PIL import Image
+import pytesseract
+try:
+    from tesserocr import PyTessBaseAPI  # in-process libtesseract, no fork/exec per page
+except ImportError:
+    PyTessBaseAPI = None
+import httpx
+from pydub import AudioSegment
+import piexif
+
+# ====== PATHS (Windows folders via WSL) ======
+INBOX = Path("/mnt/c/Users/Alex/Documents/Bookscan/inbox")   # put your photos here
+WORK  = Path("/mnt/c/Users/Alex/Documents/Bookscan/work")    # temp processed images
+OUT   = Path("/mnt/c/Users/Alex/Documents/Bookscan/out")     # text + audio outputs
+
+# ====== OCR / TTS CONFIG ======
+LANGS = ["eng"]                 # add e.g. "fra","swa" later (install tesseract-ocr-fra, etc.)
+TESS_OEM = 1                    # LSTM engine only
+TESS_PSM = 3                    # fully automatic page segmentation
+TESS_CFG = f"--oem {TESS_OEM} --psm {TESS_PSM}"   # pytesseract form of the same settings
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+MAX_LONG_SIDE = 2400            # px; ~300 DPI for a photographed page, where tesseract accuracy plateaus
+BLANK_INK_RATIO = 0.0002        # parts with less ink than this (0.02%) skip OCR; a two-word line is ~0.03%
+DEBUG_SAVE_WORK = False         # write each preprocessed page to WORK (JPEG) for inspection
+COMBINED = OUT / "book_combined.mp3"
+BATCH_MANIFEST = OUT / "batch_manifest.json"  # batch MP3 name -> page ids it covers
+OCR_CACHE = WORK / "ocr_cache"  # raw OCR text keyed by image content + OCR settings
+
+# ====== CONCURRENCY ======
+OCR_WORKERS = os.cpu_count() or 4   # cv2 + tesseract release the GIL / run as subprocesses
+TTS_BATCH_CHARS = 4500              # pages are joined into requests up to this size
+TTS_MAX_RETRIES = 3                 # retries per request on transient errors (1s, 2s, 4s backoff)
+TTS_WORKERS = 6                     # concurrent TTS requests
+
+# ====== UTILITIES ======
+def ensure_dirs():
+    for p in (INBOX, WORK, OUT, OCR_CACHE):
+        p.mkdir(parents=True, exist_ok=True)
+
+def get_exif_datetime(path: Path):
+    """Sort primarily by EXIF DateTimeOriginal; fallback to file mtime.
+
+    Also accepts an os.DirEntry, whose cached stat() avoids a second lookup.
+    """
+    try:
+        exif = piexif.load(os.fspath(path))
+        raw = exif["Exif"].get(piexif.ExifIFD.DateTimeOriginal) or exif["0th"].get(piexif.ImageIFD.DateTime)
+        if raw:
+            s = raw.decode() if isinstance(raw, bytes) else raw
+            return datetime.strptime(s, "%Y:%m:%d %H:%M:%S")
+    except Exception:
+        pass
+    return datetime.fromtimestamp(path.stat().st_mtime)
+
+def _row_extremes_np(thr):
+    """Leftmost/rightmost black pixel of every row as (y, x) points."""
+    ink = thr == 0
+    rows = np.flatnonzero(ink.any(axis=1))
+    left = ink[rows].argmax(axis=1)
+    right = thr.shape[1] - 1 - ink[rows, ::-1].argmax(axis=1)
+    return np.column_stack((np.concatenate((rows, rows)), np.concatenate((left, right)))).astype(np.int32)
+
+if njit is not None:
+    # Serial on purpose: pages are already spread over the OCR thread pool, and
+    # launching parallel kernels from several Python threads hangs numba's
+    # TBB threading layer at interpreter exit. nogil lets those pool threads
+    # run the kernel at the same time.
+    @njit(cache=True, nogil=True)
+    def _row_extremes(thr):
+        """Leftmost/rightmost black pixel of every row as (y, x) points."""
+        h, w = thr.shape
+        pts = np.empty((2 * h, 2), np.int32)
+        found = np.zeros(h, np.bool_)
+        for y in range(h):
+            x0 = 0
+            while x0 < w and thr[y, x0] != 0:
+                x0 += 1
+            if x0 == w:
+                continue
+            x1 = w - 1
+            while thr[y, x1] != 0:
+                x1 -= 1
+            pts[2 * y, 0] = y
+            pts[2 * y, 1] = x0
+            pts[2 * y + 1, 0] = y
+            pts[2 * y + 1, 1] = x1
+            found[y] = True
+        return pts[np.repeat(found, 2)]
+else:
+    _row_extremes = _row_extremes_np
+
+def list_inbox_images():
+    """Photos in INBOX (one directory scan, any-case extension) sorted by capture time."""
+    with os.scandir(INBOX) as it:
+        entries = [e for e in it if e.is_file() and os.path.splitext(e.name)[1].lower() in IMAGE_EXTS]
+    return [Path(e.path) for e in sorted(entries, key=get_exif_datetime)]
+
+_JPEG_REDUCED = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+def load_image(p: Path):
+    """Read a photo and shrink it to at most MAX_LONG_SIDE pixels on the long side."""
+    bgr = None
+    if Path(p).suffix.lower() in (".jpg", ".jpeg"):
+        # libjpeg can decode straight to 1/2, 1/4 or 1/8 size; use the largest
+        # reduction that still leaves at least MAX_LONG_SIDE pixels.
+        try:
+            with Image.open(p) as im:  # header only, no pixel decode
+                long_side = max(im.size)
+        except OSError:
+            long_side = 0
+        for factor, flag in _JPEG_REDUCED:
+            if long_side // factor >= MAX_LONG_SIDE:
+                bgr = cv2.imread(str(p), flag)
+                break
+    if bgr is None:
+        bgr = cv2.imread(str(p))
+    if bgr is None:
+        return None
+    scale = MAX_LONG_SIDE / max(bgr.shape[:2])
+    if scale < 1.0:
+        bgr = cv2.resize(bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return bgr
+
+def auto_rotate_deskew(bgr):
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    # Blur and binarise in place: one page-sized buffer instead of three
+    cv2.GaussianBlur(gray, (3,3), 0, dst=gray)
+    thr = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY+cv2.THRESH_OTSU, dst=gray)[1]
+    # The convex hull of all black pixels (all minAreaRect depends on) is spanned
+    # by each row's outermost black pixels, so pass ~2 points per row instead
+    # of an (N,2) array of every black pixel on the page.
+    coords = _row_extremes(thr)
+    if coords.size:
+        angle = cv2.minAreaRect(coords)[-1]
+        angle = -(90 + angle) if angle < -45 else -angle
+        (h,w) = thr.shape[:2]
+        M = cv2.getRotationMatrix2D((w/2,h/2), angle, 1.0)
+        # Bilinear is plenty for a binarised page that only feeds OCR
+        thr = cv2.warpAffine(thr, M, (w,h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    return thr
+
+def maybe_split_two_pages(img):
+    h, w = img.shape[:2]
+    if w < 80: return [img]
+    # Only three narrow bands are compared, so count white pixels in those
+    # slices instead of reducing every column of the page. Exact ==255 is kept
+    # because the deskew warp interpolates and leaves grey pixels on glyph edges.
+    # Not a numba kernel: count_nonzero over these slices is SIMD already and a
+    # JIT loop measured 2-5x slower (unlike _row_extremes, which does early exits).
+    def band(c0, c1):
+        return np.count_nonzero(img[:, c0:c1] == 255) / (c1 - c0)
+    mid  = band(w//2 - w//20, w//2 + w//20)
+    left = band(w//4 - w//20, w//4 + w//20)
+    right= band(3*w//4 - w//20, 3*w//4 + w//20)
+    if mid > 1.15*left and mid > 1.15*right:
+        return [img[:, :w//2], img[:, w//2:]]
+    return [img]
+
+_spell = None
+_spell_words = frozenset()
+_spell_lock = threading.Lock()
+
+def get_spell_checker():
+    """Load SpellChecker (and its dictionary) once; None if pyspellchecker isn't installed."""
+    global _spell, _spell_words
+    with _spell_lock:
+        if _spell is None:
+            try:
+                from spellchecker import SpellChecker
+                _spell = SpellChecker()
+                _spell_words = frozenset(_spell.word_frequency.dictionary.keys())
+            except ImportError:
+                print("  · Note: Install 'pyspellchecker' for automatic spelling correction")
+                _spell = False
+    return _spell or None
+
+# Letters in any script (so accented words stay whole), with internal apostrophes
+_WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+
+def clean_text(t):
+    t = " ".join(t.split())
+    t = t.replace("ﬁ","fi").replace("ﬂ","fl").strip()
+    
+    # Apply spell checking if the library is available
+    spell = get_spell_checker()
+    if spell is None:
+        return t
+
+    def correct(m):
+        word = m.group()
+        # Only lowercase-initial dictionary words are passed to correction(), which just
+        # normalises their case; proper nouns and unknown OCR tokens are left alone.
+        # Exact dictionary hits would come back unchanged, so skip the call for them.
+        if word[0].isupper() or word in _spell_words or word.lower() not in _spell_words:
+            return word
+        return spell.correction(word) or word
+
+    # Punctuation and spacing between words are left untouched
+    return _WORD_RE.sub(correct, t)
+
+_tess = threading.local()
+
+def get_tess_api(lang):
+    """Return this thread's persistent tesserocr handle for `lang`, set up like TESS_CFG."""
+    apis = getattr(_tess, "apis", None)
+    if apis is None:
+        apis = _tess.apis = {}
+    if lang not in apis:
+        apis[lang] = PyTessBaseAPI(lang=lang, oem=TESS_OEM, psm=TESS_PSM)
+    return apis[lang]
+
+def image_to_string(img, lang):
+    """OCR a numpy image in-process via tesserocr, falling back to the pytesseract CLI."""
+    if PyTessBaseAPI is None:
+        return pytesseract.image_to_string(img, lang=lang, config=TESS_CFG)
+    img = np.ascontiguousarray(img)
+    bpp = 1 if img.ndim == 2 else img.shape[2]
+    api = get_tess_api(lang)
+    api.SetImageBytes(img.tobytes(), img.shape[1], img.shape[0], bpp, img.strides[0])
+    return api.GetUTF8Text()
+
+def ocr_cached(img, lang):
+    """image_to_string() memoised on disk, so reruns over the same inbox skip OCR."""
+    h = hashlib.blake2b(img.tobytes(), digest_size=16)
+    h.update(repr(img.shape).encode())
+    # Both backends run with TESS_CFG's settings, but their output can still differ
+    h.update(("pytesseract" if PyTessBaseAPI is None else "tesserocr").encode())
+    h.update(TESS_CFG.encode())
+    h.update(lang.encode())
+    cache_file = OCR_CACHE / f"{h.hexdigest()}.txt"
+    if cache_file.exists():
+        return cache_file.read_text(encoding="utf-8")
+    txt = image_to_string(img, lang)
+    # Write then rename so another OCR worker never reads a partial entry
+    tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}")
+    tmp.write_text(txt, encoding="utf-8")
+    os.replace(tmp, cache_file)
+    return txt
+
+def is_blank(img):
+    """True for a (near-)empty binarised page, e.g. the blank half of a chapter-end spread."""
+    return np.count_nonzero(img < 128) < BLANK_INK_RATIO * img.size
+
+def ocr_ndarray(img, langs=LANGS):
+    """OCR an image array and return cleaned text, trying each language in turn."""
+    txt = ""
+    for lang in langs:
+        try:
+            txt = clean_text(ocr_cached(img, lang))
+        except Exception as e:
+            print(f"    OCR error: {str(e)}")
+            continue
+        if len(txt) > 20:
+            return txt
+    return txt
+
+# ====== TTS ======
+class TTSBackend(Protocol):
+    """A text-to-speech provider.
+
+    `name` and `key_env` are only used in progress and error messages.
+    """
+    name: str
+    key_env: str
+
+    def synthesize(self, text: str, out_path: Path) -> bool:
+        """Write `text` as an MP3 to `out_path`; False if nothing was written."""
+        ...
+
+def is_retryable(e):
+    """Transient TTS failures: dropped connections, timeouts, 408/409/429 and 5xx responses."""
+    status = getattr(e, "status_code", None) or 0
+    return isinstance(e, httpx.TransportError) or status in (408, 409, 429) or status >= 500
+
+def call_with_retries(name, request):
+    """Run one TTS `request()`, retrying transient failures; True once it succeeds."""
+    for attempt in range(TTS_MAX_RETRIES + 1):
+        try:
+            request()
+            return True
+        except Exception as e:
+            if attempt < TTS_MAX_RETRIES and is_retryable(e):
+                time.sleep(2 ** attempt)
+                continue
+            print(f"    Error calling {name} API: {str(e)}")
+            return False
+
+def silence_mp3(duration_ms, like: Path, out_path: Path):
+    """Encode `duration_ms` of silence with the same sample rate/channels as `like`."""
+    subprocess.run(
+        [AudioSegment.converter, "-y", "-loglevel", "error", "-i", str(like),
+         "-af", f"volume=0,apad,atrim=0:{duration_ms / 1000}", "-c:a", "libmp3lame", str(out_path)],
+        check=True,
+    )
+    return out_path
+
+def combine_mp3s(mp3_paths, out_path: Path):
+    """Join MP3s with short gaps using ffmpeg's concat demuxer (stream copy, no re-encode)."""
+    mp3_paths = [Path(p) for p in mp3_paths]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        lead = silence_mp3(300, mp3_paths[0], tmp / "lead.mp3")
+        gap = silence_mp3(200, mp3_paths[0], tmp / "gap.mp3")
+
+        def entry(p):
+            return "file '{}'\n".format(str(p.resolve()).replace("'", "'\\''"))
+
+        list_file = tmp / "concat.txt"
+        with open(list_file, "w", encoding="utf-8") as f:
+            f.write(entry(lead))
+            for p in mp3_paths:
+                f.write(entry(p))
+                f.write(entry(gap))
+
+        try:
+            subprocess.run(
+                [AudioSegment.converter, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                 "-i", str(list_file), "-c", "copy", str(out_path)],
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"    ffmpeg concat failed ({e}); re-encoding with pydub …")
+            combine_mp3s_pydub(mp3_paths, out_path)
+
+def combine_mp3s_pydub(mp3_paths, out_path: Path):
+    """Decode, join and re-encode with pydub; handles inputs whose formats differ."""
+    segs = [AudioSegment.from_mp3(p) for p in mp3_paths]
+    # Bring everything to one format (the highest rate/channels/width, as `+` would),
+    # then join the raw PCM once; `combined += seg` recopies the whole buffer per page.
+    rate = max(s.frame_rate for s in segs)
+    channels = max(s.channels for s in segs)
+    width = max(s.sample_width for s in segs)
+
+    def conform(s):
+        return s.set_frame_rate(rate).set_channels(channels).set_sample_width(width)
+
+    segs = [conform(s) for s in segs]
+    lead = conform(AudioSegment.silent(duration=300, frame_rate=rate))
+    gap = conform(AudioSegment.silent(duration=200, frame_rate=rate))
+    parts = [lead.raw_data]
+    for seg in segs:
+        parts.append(seg.raw_data)
+        parts.append(gap.raw_data)
+    segs[0]._spawn(b"".join(parts)).export(out_path, format="mp3")
+
+# ====== MAIN (manual run) ======
+def run(backend: TTSBackend):
+    """Interactive entry point: pick a mode and run it against `backend`."""
+    ensure_dirs()
+    
+    # Ask user which mode to run in
+    print("BookAudio Processing Options:")
+    print("1. Full process (OCR + TTS in one go)")
+    print("2. OCR only (extract text to edit later)")
+    print("3. TTS only (convert existing text files to audio)")
+    
+    while True:
+        mode = input("Select mode (1/2/3): ").strip()
+        if mode in ["1", "2", "3"]:
+            break
+        print("Invalid selection. Please enter 1, 2, or 3.")
+    
+    if mode == "1":
+        # Original full process
+        full_process(backend)
+    elif mode == "2":
+        # OCR only mode
+        ocr_only()
+    else:  # mode == "3"
+        # TTS only mode
+        tts_only(backend)
+
+def process_image(p: Path, idx: int):
+    """Deskew, split and OCR one photo. Returns [(page_id, txt), ...] or None if unreadable."""
+    bgr = load_image(p)
+    if bgr is None:
+        return None
+    thr = auto_rotate_deskew(bgr)
+    parts = maybe_split_two_pages(thr)
+
+    pages = []
+    for part_i, part in enumerate(parts, 1):
+        page_id = f"p{idx:04d}_{part_i}"
+        if DEBUG_SAVE_WORK:
+            work_img = WORK / f"{page_id}.jpg"
+            cv2.imwrite(str(work_img), part, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        # No point spending a tesseract run on an empty half
+        pages.append((page_id, "" if is_blank(part) else ocr_ndarray(part)))
+    return pages
+
+def review_text(page_id, txt):
+    """Show OCR text and let the user replace it interactively."""
+    print(f"\n--- OCR Text for {page_id} ---\n{txt}\n")
+    edit = input("Edit text? (y/n): ").lower().startswith('y')
+    if edit:
+        print("Enter corrected text (type 'END' on a new line when finished):")
+        lines = []
+        while True:
+            line = input()
+            if line.strip() == "END":
+                break
+            lines.append(line)
+        if lines:
+            txt = "\n".join(lines)
+    return txt
+
+def submit_tts_batch(backend, tts_pool, batch, tts_jobs):
+    """Queue one TTS request covering every (page_id, txt) in `batch`."""
+    mp3_path = OUT / f"batch_{len(tts_jobs) + 1:04d}.mp3"
+    text = "\n\n".join(txt for _, txt in batch)
+    print(f"  · TTS {mp3_path.stem}: {len(batch)} pages, {len(text)} chars → {backend.name} TTS …")
+    tts_jobs.append(([page_id for page_id, _ in batch], mp3_path, tts_pool.submit(backend.synthesize, text, mp3_path)))
+
+def full_process(backend: TTSBackend):
+    """Run the complete OCR + TTS pipeline in one go.
+
+    OCR runs on a worker pool and finished pages are joined into batches of up to
+    TTS_BATCH_CHARS that are synthesised on a separate TTS pool; results are
+    consumed in page order so text and audio stay in book order.
+    """
+    imgs = list_inbox_images()
+    if not imgs:
+        print("No images found in INBOX. Put photos in C:\\Users\\Alex\\Documents\\Bookscan\\inbox and run again.")
+        return
+
+    text_out = OUT / "book_text.txt"
+    mp3s = []
+    
+    # Ask user if they want to review OCR text before TTS
+    review_mode = input("Review OCR text before TTS conversion? (y/n): ").lower().startswith('y')
+
+    with open(text_out, "w", encoding="utf-8", buffering=1 << 16) as tf, \
+         ThreadPoolExecutor(max_workers=OCR_WORKERS) as ocr_pool, \
+         ThreadPoolExecutor(max_workers=TTS_WORKERS) as tts_pool:
+        ocr_jobs = [ocr_pool.submit(process_image, p, idx) for idx, p in enumerate(imgs, 1)]
+        tts_jobs = []
+        batch, batch_len = [], 0
+
+        for idx, (p, job) in enumerate(zip(imgs, ocr_jobs), 1):
+            print(f"[{idx}/{len(imgs)}] {p.name}")
+            pages = job.result()
+            if pages is None:
+                print("  (skip: unreadable image)")
+                continue
+
+            for page_id, txt in pages:
+                if txt:
+                    # Manual review option
+                    if review_mode:
+                        txt = review_text(page_id, txt)
+                    
+                    tf.write(txt + "\n\n")
+                    print(f"  · OCR {page_id}: {len(txt)} chars")
+                    if batch and batch_len + len(txt) > TTS_BATCH_CHARS:
+                        submit_tts_batch(backend, tts_pool, batch, tts_jobs)
+                        batch, batch_len = [], 0
+                    batch.append((page_id, txt))
+                    batch_len += len(txt) + 2
+                else:
+                    print("  · No readable text on this part.")
+
+        if batch:
+            submit_tts_batch(backend, tts_pool, batch, tts_jobs)
+
+        manifest = {}
+        for page_ids, mp3_path, job in tts_jobs:
+            if job.result():
+                mp3s.append(mp3_path)
+                manifest[mp3_path.name] = page_ids
+            else:
+                print(f"    ({mp3_path.name}: TTS failed — check {backend.key_env})")
+        BATCH_MANIFEST.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    if mp3s:
+        print("Combining MP3s …")
+        combine_mp3s(mp3s, OUT / "book_combined.mp3")
+        print("\n✅ Done.")
+        print(f"Text → {text_out}")
+        print(f"Combined MP3 → {OUT / 'book_combined.mp3'}")
+    else:
+        print("No audio generated — check image quality/lighting.")
+
+def ocr_only():
+    """Extract OCR text to individual files for later editing."""
+    imgs = list_inbox_images()
+    if not imgs:
+        print("No images found in INBOX. Put photos in C:\\Users\\Alex\\Documents\\Bookscan\\inbox and run again.")
+        return
+
+    # Create a text directory for individual text files
+    text_dir = OUT / "text_files"
+    text_dir.mkdir(exist_ok=True)
+    
+    # Also create the combined text file
+    text_out = OUT / "book_text.txt"
+    
+    with open(text_out, "w", encoding="utf-8", buffering=1 << 16) as tf, \
+         ThreadPoolExecutor(max_workers=OCR_WORKERS) as ocr_pool:
+        ocr_jobs = [ocr_pool.submit(process_image, p, idx) for idx, p in enumerate(imgs, 1)]
+
+        for idx, (p, job) in enumerate(zip(imgs, ocr_jobs), 1):
+            print(f"[{idx}/{len(imgs)}] {p.name}")
+            pages = job.result()
+            if pages is None:
+                print("  (skip: unreadable image)")
+                continue
+
+            for page_id, txt in pages:
+                if txt:
+                    # Save to individual text file
+                    text_file = text_dir / f"{page_id}.txt"
+                    text_file.write_text(txt, encoding="utf-8")
+                    
+                    # Also append to the combined file
+                    tf.write(txt + "\n\n")
+                    
+                    print(f"  · OCR {page_id}: {len(txt)} chars → Saved to {text_file}")
+                else:
+                    print("  · No readable text on this part.")
+    
+    print("\n✅ OCR processing complete.")
+    print(f"Individual text files → {text_dir}")
+    print(f"Combined text file → {text_out}")
+    print("\nYou can now edit the text files in your preferred editor.")
+    print("After editing, run this script again and select option 3 to convert text to audio.")
+
+def tts_only(backend: TTSBackend):
+    """Convert existing text files to audio."""
+    # Look for text files in the text_files directory
+    text_dir = OUT / "text_files"
+    if not text_dir.exists() or not list(text_dir.glob("*.txt")):
+        print(f"No text files found in {text_dir}")
+        print("Run the script with option 2 first to extract OCR text.")
+        return
+    
+    text_files = sorted(list(text_dir.glob("*.txt")))
+    print(f"Found {len(text_files)} text files to process.")
+    
+    mp3s = []
+    for text_file in text_files:
+        page_id = text_file.stem
+        print(f"Processing {page_id}...")
+        
+        # Read the edited text file
+        txt = text_file.read_text(encoding="utf-8")
+        if txt:
+            mp3_path = OUT / f"{page_id}.mp3"
+            print(f"  · TTS {page_id}: {len(txt)} chars → {backend.name} TTS …")
+            if backend.synthesize(txt, mp3_path):
+                mp3s.append(mp3_path)
+            else:
+                print(f"    (TTS failed — check {backend.key_env})")
+    
+    if mp3s:
+        print("Combining MP3s …")
+        combine_mp3s(mp3s, OUT / "book_combined.mp3")
+        print("\n✅ Done.")
+        print(f"Combined MP3 → {OUT / 'book_combined.mp3'}")
+    else:
+        print("No audio generated — check text files.")
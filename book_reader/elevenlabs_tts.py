@@ -0,0 +1,71 @@
+"""ElevenLabs text-to-speech backend."""
+import os
+import threading
+from pathlib import Path
+
+from elevenlabs.client import ElevenLabs
+
+from .core import call_with_retries
+
+ELEVEN_API_KEY = os.getenv("ELEVEN_API_KEY")  # set in shell
+VOICE_ID = "NOpBlnGInO9m6vDvFkFC"             # ElevenLabs 'Grandpa Spuds Oxley'
+MODEL_ID = "eleven_multilingual_v2"
+
+class ElevenBackend:
+    name = "ElevenLabs"
+    key_env = "ELEVEN_API_KEY"
+
+    def __init__(self, api_key=ELEVEN_API_KEY, voice_id=VOICE_ID, model_id=MODEL_ID):
+        self.api_key = api_key
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def get_client(self):
+        """Return the shared ElevenLabs client; its HTTP connections are pooled and kept alive."""
+        with self._client_lock:
+            if self._client is None:
+                self._client = ElevenLabs(api_key=self.api_key)
+        return self._client
+
+    def synthesize(self, text, out_path: Path):
+        if not text or not self.api_key:
+            return False
+
+        def request():
+            # Generate audio using the text-to-speech API
+            audio_generator = self.get_client().text_to_speech.convert(
+                text=text,
+                voice_id=self.voice_id,
+                model_id=self.model_id,
+                request_options={"max_retries": 0}
+            )
+
+            # Stream chunks straight to the output path as they arrive
+            with open(out_path, "wb") as f:
+                for chunk in audio_generator:
+                    f.write(chunk)
+
+        return call_with_retries(self.name, request)
+
+    def stream(self, text):
+        """Yield MP3 chunks from the streaming endpoint as they are generated."""
+        if not text or not self.api_key:
+            return iter(())
+        return self.get_client().text_to_speech.stream(
+            self.voice_id,
+            text=text,
+            model_id=self.model_id,
+            request_options={"max_retries": 0}
+        )
+
+_default = ElevenBackend()
+
+def eleven_tts_to_mp3(text, out_path: Path):
+    """Convert text to speech using ElevenLabs and save as MP3."""
+    return _default.synthesize(text, out_path)
+
+def eleven_tts_stream(text):
+    """Stream text as MP3 chunks from ElevenLabs without writing a file."""
+    return _default.stream(text)
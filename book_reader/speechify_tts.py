@@ -0,0 +1,62 @@
+"""Speechify text-to-speech backend."""
+import os
+import base64
+import threading
+from pathlib import Path
+
+from speechify import Speechify
+from speechify.tts import GetSpeechOptionsRequest
+
+from .core import call_with_retries
+
+SPEECHIFY_API_KEY = os.getenv("SPEECHIFY_API_KEY")  # set in shell
+VOICE_ID = "scott"             # Speechify default voice
+MODEL_ID = "simba-english"     # Use simba-multilingual for multi-language support
+
+class SpeechifyBackend:
+    name = "Speechify"
+    key_env = "SPEECHIFY_API_KEY"
+
+    def __init__(self, api_key=SPEECHIFY_API_KEY, voice_id=VOICE_ID, model_id=MODEL_ID):
+        self.api_key = api_key
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def get_client(self):
+        """Return the shared Speechify client; its HTTP connections are pooled and kept alive."""
+        with self._client_lock:
+            if self._client is None:
+                self._client = Speechify(token=self.api_key)
+        return self._client
+
+    def synthesize(self, text, out_path: Path):
+        if not text or not self.api_key:
+            return False
+
+        def request():
+            # Generate audio using the text-to-speech API
+            audio_response = self.get_client().tts.audio.speech(
+                audio_format="mp3",
+                input=text,
+                language="en-US",
+                model=self.model_id,
+                options=GetSpeechOptionsRequest(
+                    loudness_normalization=True,
+                    text_normalization=True
+                ),
+                voice_id=self.voice_id,
+                request_options={"max_retries": 0}
+            )
+
+            # Decode the base64 audio data straight into the output path
+            out_path.write_bytes(base64.b64decode(audio_response.audio_data))
+
+        return call_with_retries(self.name, request)
+
+_default = SpeechifyBackend()
+
+def speechify_tts_to_mp3(text, out_path: Path):
+    """Convert text to speech using Speechify API and save as MP3."""
+    return _default.synthesize(text, out_path)
@@ -3,26 +3,44 @@ import os
 import json
 import time
 import re
+import hashlib
+import threading
+import warnings
 import cv2
-import numpy as np
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, send_from_directory
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, send_from_directory, Response, stream_with_context, make_response
 from werkzeug.utils import secure_filename
 import ebooklib
 from ebooklib import epub
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+try:
+    from waitress import serve  # production WSGI server, used when installed
+except ImportError:
+    serve = None
+try:
+    import lxml.html  # C parser for BeautifulSoup, several times faster than html.parser
+    from lxml import etree
+    BS_PARSER = "lxml"
+except ImportError:
+    etree = None
+    BS_PARSER = "html.parser"
+# EPUB chapters are XHTML; reading them as HTML is intentional
+warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
 # Import functions from the existing script
 from book_reader_eleven_manual import (
-    ensure_dirs, get_exif_datetime, auto_rotate_deskew, 
-    maybe_split_two_pages, ocr_ndarray, clean_text, 
-    eleven_tts_to_mp3, combine_mp3s
+    ensure_dirs, get_exif_datetime, load_image, auto_rotate_deskew, 
+    maybe_split_two_pages, ocr_ndarray, clean_text, is_blank,
+    eleven_tts_to_mp3, eleven_tts_stream, combine_mp3s, OCR_WORKERS, TTS_WORKERS
 )
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max upload
+# Behind nginx/Apache, let the front-end server send audio files itself
+app.config['USE_X_SENDFILE'] = os.getenv('BOOKAUDIO_X_SENDFILE') == '1'
 
 # Define paths
 BASE = Path("/mnt/c/Users/Alex/Documents/Bookscan")
@@ -30,16 +48,58 @@ INBOX = BASE / "inbox"
 WORK = BASE / "work"
 OUT = BASE / "out"
 TEXT_DIR = OUT / "text_files"
+EPUB_CACHE = OUT / "epub_cache"
+EPUB_CACHE_VERSION = 2  # bump when extract_text_from_epub's output changes
 
 # Ensure directories exist
 ensure_dirs()
 TEXT_DIR.mkdir(exist_ok=True)
+EPUB_CACHE.mkdir(exist_ok=True)
+
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+_BLOCK_XPATH = '|'.join(f'//{tag}' for tag in HEADING_TAGS + ('p', 'div'))
+_XML_ENCODING_RE = re.compile(rb'\s*<\?xml[^>]*encoding=["\']([A-Za-z0-9._-]+)')
+_PAGE_NUM_RE = re.compile(r'\s\d+\s*$')           # TOC-style line ending in a page number
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+def _text(el, sep):
+    """lxml equivalent of BeautifulSoup's get_text(sep, strip=True)."""
+    return sep.join(t for t in (t.strip() for t in el.itertext()) if t)
+
+def chapter_blocks(content):
+    """Parse one EPUB document into (lowercased first h1-h3 title, [(is_heading, text), ...]).
+
+    Blocks are headings, paragraphs and divs in document order. Uses lxml's
+    XPath directly when available, with no Python object per element, and
+    BeautifulSoup otherwise.
+    """
+    if etree is not None:
+        # EPUB documents are XHTML, UTF-8 unless their XML declaration says otherwise
+        m = _XML_ENCODING_RE.match(content)
+        parser = etree.HTMLParser(encoding=m.group(1).decode('ascii') if m else 'utf-8')
+        try:
+            tree = lxml.html.document_fromstring(content, parser=parser)
+        except etree.ParserError:  # empty document
+            return "", []
+        # get_text() skips script/style contents; itertext() doesn't
+        etree.strip_elements(tree, 'script', 'style', with_tail=False)
+        heading = tree.xpath('(//h1|//h2|//h3)[1]')
+        title = _text(heading[0], '').lower() if heading else ""
+        return title, [(el.tag in HEADING_TAGS, _text(el, ' ')) for el in tree.xpath(_BLOCK_XPATH)]
+        
+    soup = BeautifulSoup(content, BS_PARSER)
+    heading = soup.find(['h1', 'h2', 'h3'])
+    title = heading.get_text(strip=True).lower() if heading else ""
+    blocks = [(tag.name in HEADING_TAGS, tag.get_text(' ', strip=True))
+              for tag in soup.find_all(HEADING_TAGS + ('p', 'div'))]
+    # The tree's parent/child links are cycles; break them so it is freed now
+    soup.decompose()
+    return title, blocks
 
 # Helper function to extract text from EPUB files
 def extract_text_from_epub(epub_path):
     """Extract text content from an EPUB file with preserved paragraph formatting."""
     book = epub.read_epub(epub_path)
-    chapter_items = []
     chapters = []
     
     # Get book title for filtering
@@ -50,45 +110,25 @@ def extract_text_from_epub(epub_path):
     non_content_indicators = ['cover', 'title page', 'copyright', 'contents', 'table of contents', 
                              'endorsements', 'dedication', 'acknowledgments', 'back cover', 'back ads']
     
-    # First collect all items in their original order to maintain proper sequence
+    # Process items one at a time, in their original order, so only one
+    # parsed chapter is held in memory at once
     for item in book.get_items():
-        if item.get_type() == ebooklib.ITEM_DOCUMENT:
-            # Parse HTML content
-            soup = BeautifulSoup(item.get_content(), 'html.parser')
-            
-            # Try to identify chapter title/heading
-            chapter_title = ""
-            heading = soup.find(['h1', 'h2', 'h3'])
-            if heading:
-                chapter_title = heading.get_text(strip=True).lower()
-            
-            # Skip non-content sections based on title
-            if any(indicator in chapter_title.lower() for indicator in non_content_indicators):
-                continue
-                
-            # Store the item for processing in order
-            chapter_items.append((item, soup, chapter_title))
-    
-    # Now process each chapter in the correct order
-    for item, soup, chapter_title in chapter_items:
-        # Process paragraphs to preserve formatting
-        paragraphs = []
+        if item.get_type() != ebooklib.ITEM_DOCUMENT:
+            continue
+        chapter_title, blocks = chapter_blocks(item.get_content())
         
-        # First handle headings separately to make them stand out
-        headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-        for heading in headings:
-            text = heading.get_text(' ', strip=True)
-            if text.strip():
-                # Add extra newlines around headings
-                paragraphs.append(text)
-                # Add an empty line after heading
-                paragraphs.append('')
+        # Skip non-content sections based on title
+        if any(indicator in chapter_title.lower() for indicator in non_content_indicators):
+            continue
         
-        # Then handle paragraphs
-        for p in soup.find_all(['p', 'div']):
-            text = p.get_text(' ', strip=True)
-            if text.strip():
+        # Process paragraphs to preserve formatting; headings get an empty
+        # line after them so they stand out
+        paragraphs = []
+        for is_heading, text in blocks:
+            if text:
                 paragraphs.append(text)
+                if is_heading:
+                    paragraphs.append('')
         
         # Join paragraphs with double newlines to preserve paragraph breaks
         # and filter out any consecutive empty lines
@@ -110,9 +150,8 @@ def extract_text_from_epub(epub_path):
             continue
             
         # Skip if it looks like a table of contents (lots of page numbers)
-        page_number_pattern = r'\s\d+\s*$'
         lines = chapter_text.split('\n')
-        page_number_lines = sum(1 for line in lines if re.search(page_number_pattern, line))
+        page_number_lines = sum(1 for line in lines if _PAGE_NUM_RE.search(line))
         if page_number_lines > 5 and page_number_lines / len(lines) > 0.3:
             continue
         
@@ -122,56 +161,78 @@ def extract_text_from_epub(epub_path):
     
     return chapters
 
+def extract_text_from_epub_cached(epub_path):
+    """extract_text_from_epub() memoised on disk by file content, so re-uploads skip parsing."""
+    h = hashlib.blake2b(Path(epub_path).read_bytes(), digest_size=16)
+    h.update(str(EPUB_CACHE_VERSION).encode())
+    cache_file = EPUB_CACHE / f"{h.hexdigest()}.json"
+    if cache_file.exists():
+        return json.loads(cache_file.read_text(encoding="utf-8"))
+    chapters = extract_text_from_epub(epub_path)
+    cache_file.write_text(json.dumps(chapters), encoding="utf-8")
+    return chapters
+
 # Book state management
 class BookState:
     def __init__(self):
+        # Held across multi-step changes (load/add/save); re-entrant so the
+        # methods below can take it again
+        self.lock = threading.RLock()
         self.current_book = None
         self.pages = []
-        self.processed_pages = []
+        self._index = {}           # page id -> page dict in self.pages
+        self._processed = set()
         self.current_page_index = 0
         
     def load_book(self, book_name):
-        self.current_book = book_name
-        self.pages = []
-        self.processed_pages = []
-        self.current_page_index = 0
+        with self.lock:
+            self.current_book = book_name
+            self.pages = []
+            self._index = {}
+            self._processed = set()
+            self.current_page_index = 0
         
-        # Load existing pages if any
-        if (TEXT_DIR / book_name).exists():
-            for text_file in sorted((TEXT_DIR / book_name).glob("*.txt")):
-                self.pages.append({
-                    "id": text_file.stem,
-                    "text": text_file.read_text(encoding="utf-8"),
-                    "processed": True
-                })
-            self.processed_pages = [p["id"] for p in self.pages]
-        
-    def add_page(self, page_id, text):
-        self.pages.append({
-            "id": page_id,
-            "text": text,
-            "processed": False
-        })
+            # Load existing pages if any; scandir's entries carry the file type,
+            # which saves a stat per file on the /mnt/c mount
+            book_dir = TEXT_DIR / book_name
+            if book_dir.exists():
+                names = sorted(e.name for e in os.scandir(book_dir) if e.name.endswith(".txt") and e.is_file())
+                for name in names:
+                    text_file = book_dir / name
+                    self.add_page(text_file.stem, text_file.read_text(encoding="utf-8"), processed=True)
+        
+    @property
+    def processed_pages(self):
+        """Ids of processed pages, in book order."""
+        return [p["id"] for p in self.pages if p["id"] in self._processed]
+        
+    def add_page(self, page_id, text, processed=False):
+        with self.lock:
+            page = {
+                "id": page_id,
+                "text": text,
+                "processed": processed
+            }
+            self.pages.append(page)
+            self._index[page_id] = page
+            if processed:
+                self._processed.add(page_id)
         
     def update_page(self, page_id, text):
-        for page in self.pages:
-            if page["id"] == page_id:
+        with self.lock:
+            page = self._index.get(page_id)
+            if page:
                 page["text"] = text
-                break
                 
     def mark_processed(self, page_id):
-        for page in self.pages:
-            if page["id"] == page_id:
+        with self.lock:
+            page = self._index.get(page_id)
+            if page:
                 page["processed"] = True
-                if page_id not in self.processed_pages:
-                    self.processed_pages.append(page_id)
-                break
+                self._processed.add(page_id)
                 
     def get_page(self, page_id):
-        for page in self.pages:
-            if page["id"] == page_id:
-                return page
-        return None
+        return self._index.get(page_id)
         
     def get_current_page(self):
         if not self.pages or self.current_page_index >= len(self.pages):
@@ -179,43 +240,91 @@ class BookState:
         return self.pages[self.current_page_index]
         
     def next_page(self):
-        if self.current_page_index < len(self.pages) - 1:
-            self.current_page_index += 1
-            return self.pages[self.current_page_index]
-        return None
+        with self.lock:
+            if self.current_page_index < len(self.pages) - 1:
+                self.current_page_index += 1
+                return self.pages[self.current_page_index]
+            return None
         
     def prev_page(self):
-        if self.current_page_index > 0:
-            self.current_page_index -= 1
-            return self.pages[self.current_page_index]
-        # Return the current page when at the beginning instead of None
-        elif self.pages and self.current_page_index == 0:
-            return self.pages[0]
-        return None
+        with self.lock:
+            if self.current_page_index > 0:
+                self.current_page_index -= 1
+                return self.pages[self.current_page_index]
+            # Return the current page when at the beginning instead of None
+            elif self.pages and self.current_page_index == 0:
+                return self.pages[0]
+            return None
         
     def save_all(self):
-        if not self.current_book:
-            return
+        with self.lock:
+            if not self.current_book:
+                return
             
+            for page in self.pages:
+                self._write_page(page)
+            
+            # Also create combined text file
+            self.save_combined()
+        
+    def save_page(self, page_id):
+        """Write a single page's text file; combined.txt is left for save_combined()."""
+        with self.lock:
+            page = self._index.get(page_id)
+            if self.current_book and page:
+                self._write_page(page)
+            
+    def save_combined(self, fsync=False):
+        """Write combined.txt page by page rather than building the whole book in memory."""
+        with self.lock:
+            if not self.current_book:
+                return
+            
+            combined_file = self._book_dir() / "combined.txt"
+            with combined_file.open("w", encoding="utf-8") as f:
+                for i, page in enumerate(self.pages):
+                    if i:
+                        f.write("\n\n")
+                    f.write(page["text"])
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        
+    def _book_dir(self):
         book_dir = TEXT_DIR / self.current_book
         book_dir.mkdir(exist_ok=True)
+        return book_dir
         
-        for page in self.pages:
-            page_file = book_dir / f"{page['id']}.txt"
-            page_file.write_text(page["text"], encoding="utf-8")
-            
-        # Also create combined text file
-        combined_text = "\n\n".join([page["text"] for page in self.pages])
-        combined_file = book_dir / "combined.txt"
-        combined_file.write_text(combined_text, encoding="utf-8")
+    def _write_page(self, page):
+        page_file = self._book_dir() / f"{page['id']}.txt"
+        page_file.write_text(page["text"], encoding="utf-8")
         
     def get_progress(self):
         if not self.pages:
             return 0
-        return int((len(self.processed_pages) / len(self.pages)) * 100)
+        return int((len(self._processed) / len(self.pages)) * 100)
+
+# One BookState per book, created on first use, so concurrent requests for
+# different books never share pages or the current page index
+_states = {}
+_states_lock = threading.RLock()
 
-# Initialize book state
-book_state = BookState()
+def get_state(book_name):
+    """The BookState for `book_name`, loaded from disk the first time it is asked for."""
+    with _states_lock:
+        state = _states.get(book_name)
+        if state is None:
+            state = _states[book_name] = BookState()
+            state.load_book(book_name)
+    return state
+
+def request_state():
+    """BookState named by the request's book_name (query string or form), or None if no such book."""
+    book_name = secure_filename(request.values.get('book_name', ''))
+    # Only books on disk get a state, so made-up names don't pile up in _states
+    if not book_name or not (TEXT_DIR / book_name).is_dir():
+        return None
+    return get_state(book_name)
 
 # Routes
 @app.route('/audio/<path:filename>')
@@ -224,29 +333,71 @@ def serve_audio(filename):
     # Split the path to determine if it's a preview or regular audio file
     parts = filename.split('/')
     if len(parts) > 1 and parts[0] == 'previews':
-        # It's a preview audio file
-        return send_from_directory(OUT / 'previews', parts[1])
+        # It's a preview audio file; names are timestamped, so they can be cached
+        return send_from_directory(OUT / 'previews', parts[1], mimetype='audio/mpeg',
+                                   conditional=True, max_age=3600)
     else:
-        # It's a regular audio file
+        # It's a regular audio file; conditional=True answers Range requests,
+        # so the player can start and seek without downloading the whole book
         book_name = parts[0]
         audio_file = '/'.join(parts[1:])
-        return send_from_directory(OUT / book_name, audio_file)
+        return send_from_directory(OUT / book_name, audio_file, mimetype='audio/mpeg', conditional=True)
+
+_books_cache = {"mtime": None, "books": []}
+
+def list_books():
+    """Book directories under TEXT_DIR, rescanned only when its mtime changes."""
+    if not TEXT_DIR.exists():
+        return []
+    mtime = TEXT_DIR.stat().st_mtime_ns
+    if mtime != _books_cache["mtime"]:
+        _books_cache["books"] = [e.name for e in os.scandir(TEXT_DIR) if e.is_dir()]
+        _books_cache["mtime"] = mtime
+    return _books_cache["books"]
+
+def invalidate_books():
+    _books_cache["mtime"] = None
 
 @app.route('/')
 def index():
     """Home page with book selection and upload options"""
     # Get list of existing books
-    books = []
-    if TEXT_DIR.exists():
-        books = [d.name for d in TEXT_DIR.iterdir() if d.is_dir()]
+    books = list_books()
     
-    return render_template('index.html', books=books)
+    # ETag the page so browsers get a 304 while the book list is unchanged
+    response = make_response(render_template('index.html', books=books))
+    response.add_etag()
+    return response.make_conditional(request)
 
 @app.route('/test_upload')
 def test_upload():
     """Test page for EPUB upload"""
     return render_template('test_upload.html')
 
+def _process_one(img_path, idx):
+    """Deskew, split and OCR one uploaded image. Returns [(page_id, txt), ...]."""
+    bgr = load_image(img_path)
+    if bgr is None:
+        return []
+        
+    thr = auto_rotate_deskew(bgr)
+    parts = maybe_split_two_pages(thr)
+    
+    pages = []
+    for part_i, part in enumerate(parts, 1):
+        page_id = f"p{idx:04d}_{part_i}"
+        work_img = WORK / f"{page_id}.png"
+        cv2.imwrite(str(work_img), part)
+        
+        # Perform OCR, unless it's a blank half
+        if is_blank(part):
+            continue
+        txt = ocr_ndarray(part)
+        if txt:
+            # Clean text
+            pages.append((page_id, clean_text(txt)))
+    return pages
+
 @app.route('/upload', methods=['POST'])
 def upload_images():
     """Handle image upload and OCR processing"""
@@ -259,6 +410,7 @@ def upload_images():
     # Create book directory
     book_dir = TEXT_DIR / book_name
     book_dir.mkdir(exist_ok=True)
+    invalidate_books()
     
     # Process uploaded images
     files = request.files.getlist('images')
@@ -275,35 +427,20 @@ def upload_images():
     # Sort images by EXIF date
     saved_images = sorted(saved_images, key=get_exif_datetime)
     
-    # Initialize book state
-    book_state.load_book(book_name)
-    
-    # Process each image
-    for idx, img_path in enumerate(saved_images, 1):
-        # Read and process image
-        bgr = cv2.imread(str(img_path))
-        if bgr is None:
-            continue
-            
-        thr = auto_rotate_deskew(bgr)
-        parts = maybe_split_two_pages(thr)
+    # Initialize book state; the book is locked until its pages are saved
+    state = get_state(book_name)
+    with state.lock:
+        state.load_book(book_name)
         
-        for part_i, part in enumerate(parts, 1):
-            page_id = f"p{idx:04d}_{part_i}"
-            work_img = WORK / f"{page_id}.png"
-            cv2.imwrite(str(work_img), part)
-            
-            # Perform OCR
-            txt = ocr_ndarray(part)
-            if txt:
-                # Clean text
-                txt = clean_text(txt)
-                
-                # Add to book state
-                book_state.add_page(page_id, txt)
-    
-    # Save initial state
-    book_state.save_all()
+        # OCR the images on a worker pool; map() yields results in input order,
+        # and the state is only touched here on the request thread
+        with ThreadPoolExecutor(max_workers=OCR_WORKERS) as pool:
+            for pages in pool.map(_process_one, saved_images, range(1, len(saved_images) + 1)):
+                for page_id, txt in pages:
+                    state.add_page(page_id, txt)
+        
+        # Save initial state
+        state.save_all()
     
     # Redirect to editor
     return redirect(url_for('edit_book', book_name=book_name))
@@ -320,6 +457,7 @@ def upload_epub():
     # Create book directory
     book_dir = TEXT_DIR / book_name
     book_dir.mkdir(exist_ok=True)
+    invalidate_books()
     
     # Save EPUB to inbox temporarily
     epub_file = request.files['epub']
@@ -327,18 +465,20 @@ def upload_epub():
     epub_file.save(epub_path)
     
     # Extract text from EPUB
-    chapters = extract_text_from_epub(epub_path)
+    chapters = extract_text_from_epub_cached(epub_path)
     
     # Initialize book state
-    book_state.load_book(book_name)
-    
-    # Add chapters to book state
-    for idx, chapter in enumerate(chapters, 1):
-        page_id = f"c{idx:04d}"
-        book_state.add_page(page_id, chapter)
-    
-    # Save initial state
-    book_state.save_all()
+    state = get_state(book_name)
+    with state.lock:
+        state.load_book(book_name)
+        
+        # Add chapters to book state
+        for idx, chapter in enumerate(chapters, 1):
+            page_id = f"c{idx:04d}"
+            state.add_page(page_id, chapter)
+        
+        # Save initial state
+        state.save_all()
     
     # Redirect to editor
     return redirect(url_for('edit_book', book_name=book_name))
@@ -346,22 +486,28 @@ def upload_epub():
 @app.route('/book/<book_name>')
 def edit_book(book_name):
     """Book editor interface"""
-    book_state.load_book(book_name)
-    current_page = book_state.get_current_page()
-    
-    return render_template(
-        'editor.html', 
-        book_name=book_name,
-        current_page=current_page,
-        current_page_index=book_state.current_page_index,
-        progress=book_state.get_progress(),
-        total_pages=len(book_state.pages)
-    )
+    book_name = secure_filename(book_name)
+    if not book_name or not (TEXT_DIR / book_name).is_dir():
+        return redirect(url_for('index'))
+    # get_state loads the book on first use; later visits reuse the cached pages
+    state = get_state(book_name)
+    with state.lock:
+        return render_template(
+            'editor.html', 
+            book_name=book_name,
+            current_page=state.get_current_page(),
+            current_page_index=state.current_page_index,
+            progress=state.get_progress(),
+            total_pages=len(state.pages)
+        )
 
 @app.route('/api/page/<page_id>', methods=['GET'])
 def get_page(page_id):
     """Get page content"""
-    page = book_state.get_page(page_id)
+    state = request_state()
+    if state is None:
+        return jsonify({"error": "Book name required"}), 400
+    page = state.get_page(page_id)
     if page:
         return jsonify(page)
     return jsonify({"error": "Page not found"}), 404
@@ -369,44 +515,63 @@ def get_page(page_id):
 @app.route('/api/page/<page_id>', methods=['POST'])
 def update_page(page_id):
     """Update page content"""
+    state = request_state()
+    if state is None:
+        return jsonify({"error": "Book name required"}), 400
     text = request.form.get('text', '')
-    book_state.update_page(page_id, text)
-    book_state.mark_processed(page_id)
-    book_state.save_all()
+    with state.lock:
+        state.update_page(page_id, text)
+        state.mark_processed(page_id)
+        # Only this page changed; combined.txt is rebuilt on finalize / audio generation
+        state.save_page(page_id)
+    return jsonify({"success": True})
+
+@app.route('/api/finalize', methods=['POST'])
+def finalize_book():
+    """Rebuild the book's combined text file from the current pages"""
+    state = request_state()
+    if state is None:
+        return jsonify({"error": "Book name required"}), 400
+        
+    state.save_combined(fsync=True)
     return jsonify({"success": True})
 
 @app.route('/api/next_page', methods=['GET'])
 def next_page():
     """Get next page"""
-    page = book_state.next_page()
+    state = request_state()
+    if state is None:
+        return "<div id='editor-content' class='editor-container'><div class='alert alert-danger'>No book selected.</div></div>", 400
+    with state.lock:
+        page = state.next_page()
+        page_index, total = state.current_page_index, len(state.pages)
     if page:
-        html = f'''
-        <div id="editor-content" class="editor-container">
-            <textarea id="editor-textarea" class="editor-textarea" data-page-id="{page['id']}">{page['text']}</textarea>
-        </div>
-        <script>
-            document.getElementById('current-page-num').textContent = '{book_state.current_page_index + 1}';
-            document.getElementById('total-pages').textContent = '{len(book_state.pages)}';
-        </script>
-        '''
-        return html
+        # Jinja compiles the fragment once and autoescapes the page text
+        return render_template(
+            '_editor_content.html',
+            current_page=page,
+            current_page_index=page_index,
+            total_pages=total
+        )
     return "<div id='editor-content' class='editor-container'><div class='alert alert-warning'>No more pages.</div></div>", 404
 
 @app.route('/api/prev_page', methods=['GET'])
 def prev_page():
     """Get previous page"""
-    page = book_state.prev_page()
+    state = request_state()
+    if state is None:
+        return "<div id='editor-content' class='editor-container'><div class='alert alert-danger'>No book selected.</div></div>", 400
+    with state.lock:
+        page = state.prev_page()
+        page_index, total = state.current_page_index, len(state.pages)
     if page:
-        html = f'''
-        <div id="editor-content" class="editor-container">
-            <textarea id="editor-textarea" class="editor-textarea" data-page-id="{page['id']}">{page['text']}</textarea>
-        </div>
-        <script>
-            document.getElementById('current-page-num').textContent = '{book_state.current_page_index + 1}';
-            document.getElementById('total-pages').textContent = '{len(book_state.pages)}';
-        </script>
-        '''
-        return html
+        # Jinja compiles the fragment once and autoescapes the page text
+        return render_template(
+            '_editor_content.html',
+            current_page=page,
+            current_page_index=page_index,
+            total_pages=total
+        )
     # Return 200 status even when at the first page, just show a message
     return "<div id='editor-content' class='editor-container'><div class='alert alert-info'>You are at the first page.</div></div>", 200
 
@@ -444,31 +609,55 @@ def preview_audio():
     except Exception as e:
         return jsonify({"error": str(e), "success": False}), 500
 
+@app.route('/api/preview_audio_stream', methods=['GET'])
+def preview_audio_stream():
+    """Stream a short audio preview straight from the TTS response"""
+    # GET so an <audio> element can use the URL directly and play as bytes arrive
+    text = request.args.get('text', '')[:500]
+    if not text:
+        return jsonify({"error": "Text required", "success": False}), 400
+        
+    # Pull the first chunk here so API errors still get a proper status code
+    try:
+        chunks = iter(eleven_tts_stream(text))
+        first = next(chunks, b"")
+    except Exception as e:
+        return jsonify({"error": str(e), "success": False}), 500
+    if not first:
+        return jsonify({"error": "Failed to generate audio", "success": False}), 500
+        
+    def generate():
+        yield first
+        yield from chunks
+    return Response(stream_with_context(generate()), mimetype='audio/mpeg')
+
 @app.route('/api/generate_audio', methods=['POST'])
 def generate_audio():
     """Generate audio for the current book"""
-    book_name = request.form.get('book_name')
+    book_name = secure_filename(request.form.get('book_name', ''))
     if not book_name:
         return jsonify({"error": "Book name required"}), 400
+    # Unknown books are refused before anything is written under TEXT_DIR or OUT
+    if not (TEXT_DIR / book_name).is_dir():
+        return jsonify({"error": "Book not found"}), 404
         
-    # Load book if not already loaded
-    if book_state.current_book != book_name:
-        book_state.load_book(book_name)
+    # Bring combined.txt up to date with any edits saved since upload, and
+    # take a snapshot of the pages so edits during synthesis don't race it
+    state = get_state(book_name)
+    with state.lock:
+        state.save_combined()
+        pages = [dict(page) for page in state.pages]
     
     # Create output directory for audio
     audio_dir = OUT / book_name
     audio_dir.mkdir(exist_ok=True)
     
-    # Generate audio for each page
-    mp3s = []
-    for page in book_state.pages:
-        page_id = page["id"]
-        txt = page["text"]
-        
-        if txt:
-            mp3_path = audio_dir / f"{page_id}.mp3"
-            if eleven_tts_to_mp3(txt, mp3_path):
-                mp3s.append(mp3_path)
+    # Generate audio for each page; the requests are network-bound, so run
+    # TTS_WORKERS of them at once (eleven_tts_to_mp3 retries 429s/5xx itself)
+    jobs = [(page["text"], audio_dir / f"{page['id']}.mp3") for page in pages if page["text"]]
+    with ThreadPoolExecutor(max_workers=TTS_WORKERS) as pool:
+        results = pool.map(lambda job: eleven_tts_to_mp3(*job), jobs)
+        mp3s = [mp3_path for (_, mp3_path), ok in zip(jobs, results) if ok]
     
     # Combine all MP3s
     if mp3s:
@@ -489,26 +678,28 @@ def chunk_text():
     max_chars = int(request.form.get('max_chars', 5000))
     
     # Split text into sentences
-    import re
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    sentences = _SENTENCE_SPLIT_RE.split(text)
     
+    # Collect each chunk's sentences in a list and join once at the boundary;
+    # growing a string with += recopies it for every sentence
     chunks = []
-    current_chunk = ""
+    current = []
+    current_len = 0  # len(" ".join(current))
     
     for sentence in sentences:
         # If adding this sentence would exceed max_chars, start a new chunk
-        if len(current_chunk) + len(sentence) > max_chars:
-            chunks.append(current_chunk)
-            current_chunk = sentence
+        if current_len + len(sentence) > max_chars:
+            chunks.append(" ".join(current))
+            current = [sentence] if sentence else []
+            current_len = len(sentence)
         else:
-            if current_chunk:
-                current_chunk += " " + sentence
-            else:
-                current_chunk = sentence
+            current_len += len(sentence) + (1 if current_len else 0)
+            if current_len:
+                current.append(sentence)
     
     # Add the last chunk if it's not empty
-    if current_chunk:
-        chunks.append(current_chunk)
+    if current_len:
+        chunks.append(" ".join(current))
     
     return jsonify({"chunks": chunks})
 
@@ -524,7 +715,15 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='BookAudio Web UI')
     parser.add_argument('--port', type=int, default=5000, help='Port to run the server on')
     parser.add_argument('--host', type=str, default='0.0.0.0', help='Host to run the server on')
+    parser.add_argument('--threads', type=int, default=8, help='Request threads (OCR/TTS calls block one each)')
+    parser.add_argument('--debug', action='store_true', help='Use the Flask dev server with reloader and debugger')
     args = parser.parse_args()
     
-    # Run the app
-    app.run(debug=True, host=args.host, port=args.port)
+    # Run the app. One process with several threads: book states live in this
+    # process, so multiple worker processes would each edit their own copy of a book.
+    if args.debug:
+        app.run(debug=True, host=args.host, port=args.port)
+    elif serve is not None:
+        serve(app, host=args.host, port=args.port, threads=args.threads)
+    else:
+        app.run(host=args.host, port=args.port, threaded=True)
@@ -1,28 +1,51 @@
 #!/usr/bin/env python3
 import os
 import json
-import time
+import hashlib
+import warnings
 import re
 import cv2
-import numpy as np
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, send_from_directory
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, render_template, request, jsonify, redirect, url_for, send_from_directory, \
+    Response, stream_with_context
 from werkzeug.utils import secure_filename
 import ebooklib
 from ebooklib import epub
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString, CData, XMLParsedAsHTMLWarning
+try:
+    import lxml.html  # C parser for BeautifulSoup, several times faster than html.parser
+    from lxml import etree
+    BS_PARSER = "lxml"
+except ImportError:
+    etree = None
+    BS_PARSER = "html.parser"
+try:
+    from waitress import serve  # production WSGI server, used when installed
+except ImportError:
+    serve = None
+# EPUB chapters are XHTML; reading them as HTML is intentional
+warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+try:
+    import orjson  # Rust JSON codec working on bytes, for the book_data files
+    json_loads, json_dumps = orjson.loads, orjson.dumps
+except ImportError:
+    json_loads = json.loads
+    def json_dumps(obj):
+        return json.dumps(obj).encode("utf-8")
 
 # Import functions from the Speechify version script
 from book_reader_speechify_manual import (
-    ensure_dirs, get_exif_datetime, auto_rotate_deskew, 
-    maybe_split_two_pages, ocr_ndarray, clean_text, 
-    speechify_tts_to_mp3, combine_mp3s
+    ensure_dirs, load_image, auto_rotate_deskew,
+    maybe_split_two_pages, ocr_ndarray,
+    speechify_tts_to_mp3, combine_mp3s, OCR_WORKERS, TTS_WORKERS
 )
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max upload
+UPLOAD_COPY_BUFFER = 1 << 20  # copy uploads to disk 1 MiB at a time (werkzeug default: 16 KiB)
 
 # Define paths
 BASE = Path("/mnt/c/Users/Alex/Documents/Bookscan")
@@ -30,120 +53,229 @@ INBOX = BASE / "inbox"
 WORK = BASE / "work"
 OUT = BASE / "out"
 TEXT_DIR = OUT / "text_files"
+EPUB_CACHE = OUT / "epub_cache"  # shared with bookaudio_web.py; entries here are prefixed
+EPUB_CACHE_VERSION = 4  # bump when extract_text_from_epub's output changes
+# Preprocessed pages in WORK are binarised and only kept for inspection:
+# write them as 1-bit PNGs (anti-aliased edge pixels from the deskew snap to
+# black/white), ~3x faster to encode and ~20x smaller than 8-bit
+WORK_PNG_PARAMS = [cv2.IMWRITE_PNG_BILEVEL, 1]
 
 # Ensure directories exist
 ensure_dirs()
 TEXT_DIR.mkdir(exist_ok=True)
+EPUB_CACHE.mkdir(exist_ok=True)
+
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+BLOCK_TAGS = HEADING_TAGS + ('p', 'div')
+_XML_ENCODING_RE = re.compile(rb'\s*<\?xml[^>]*encoding=["\']([A-Za-z0-9._-]+)')
+# Words that indicate non-content sections, found anywhere in the lowercased
+# chapter title (so 'cover' also matches 'back cover' or 'covers')
+_NON_CONTENT_RE = re.compile('|'.join(map(re.escape, [
+    'cover', 'title page', 'copyright', 'contents', 'table of contents',
+    'endorsements', 'dedication', 'acknowledgments', 'back cover', 'back ads'])))
+
+# text_tools patterns, compiled once rather than per request
+_SENTENCE_END_RE = re.compile(r'([.!?]+)')
+_MULTISPACE_RE = re.compile(r'\s+')
+_SPACE_BEFORE_PUNCT_RE = re.compile(r'\s+([.,!?;:])')
+_PUNCT_SPACE_RE = re.compile(r'([.,!?;:])\s*([a-zA-Z])')
+_HYPHEN_WRAP_RE = re.compile(r'(\w+)-\s*\n\s*(\w+)')
+_PARA_BREAK_RE = re.compile(r'\n\s*\n')
+_SINGLE_NL_RE = re.compile(r'(?<!\n)\n(?!\n)')
+
+# clean_book_name: drop non-word characters, then join on runs of hyphens/whitespace
+_BOOK_NAME_DROP_RE = re.compile(r'[^\w\s-]')
+_BOOK_NAME_SEP_RE = re.compile(r'[-\s]+')
+
+def _text(el, sep):
+    """lxml equivalent of BeautifulSoup's get_text(sep, strip=True)."""
+    return sep.join(t for t in (t.strip() for t in el.itertext()) if t)
+
+def _add_loose(loose, text):
+    text = text and text.strip()
+    if text:
+        loose.append(text)
+
+def chapter_blocks(content):
+    """Parse one EPUB document into (lowercased first h1-h3 title, [(is_heading, text), ...]).
+
+    Blocks are headings, paragraphs and divs in document order, read straight
+    from lxml's tree when available and through BeautifulSoup otherwise.
+    Paragraphs/divs that contain a heading (section wrappers) aren't emitted
+    whole, since their text repeats the heading and usually the whole chapter;
+    only their own loose text (outside any inner block) is kept, in place.
+    """
+    title = None
+    blocks = []
+
+    def flush(loose):
+        if loose:
+            blocks.append((False, ' '.join(loose)))
+            loose.clear()
+
+    if etree is not None:
+        # EPUB documents are XHTML, UTF-8 unless their XML declaration says otherwise
+        m = _XML_ENCODING_RE.match(content)
+        parser = etree.HTMLParser(encoding=m.group(1).decode('ascii') if m else 'utf-8')
+        try:
+            tree = lxml.html.document_fromstring(content, parser=parser)
+        except etree.ParserError:  # empty document
+            return "", []
+        # get_text() skips script/style contents; itertext() doesn't
+        etree.strip_elements(tree, 'script', 'style', with_tail=False)
+        # The set keeps each wrapper's proxy alive, so they compare by identity
+        wrappers = set()
+        for el in tree.iter(*HEADING_TAGS):
+            if title is None and el.tag in ('h1', 'h2', 'h3'):
+                title = _text(el, '').lower()
+            wrappers.update(el.iterancestors('p', 'div'))
+
+        def walk(el, loose):
+            # `loose` collects the enclosing wrapper's text; None inside an emitted block
+            if el.tag in BLOCK_TAGS:
+                flush(loose)
+                if el in wrappers:
+                    loose = []
+                else:
+                    blocks.append((el.tag in HEADING_TAGS, _text(el, ' ')))
+                    loose = None
+            if loose is not None and isinstance(el.tag, str):  # not a comment/PI
+                _add_loose(loose, el.text)
+            for child in el:
+                walk(child, loose)
+                if loose is not None:
+                    _add_loose(loose, child.tail)
+            if el in wrappers:
+                flush(loose)
+
+        walk(tree, None)
+        return title or "", blocks
+        
+    soup = BeautifulSoup(content, BS_PARSER)
+    # Tags hash by content, so track the wrappers by id()
+    wrappers = set()
+    for tag in soup.find_all(HEADING_TAGS):
+        if title is None and tag.name in ('h1', 'h2', 'h3'):
+            title = tag.get_text(strip=True).lower()
+        wrappers.update(id(p) for p in tag.parents if p.name in ('p', 'div'))
+
+    def walk(tag, loose):
+        if tag.name in BLOCK_TAGS:
+            flush(loose)
+            if id(tag) in wrappers:
+                loose = []
+            else:
+                blocks.append((tag.name in HEADING_TAGS, tag.get_text(' ', strip=True)))
+                loose = None
+        for child in tag.children:
+            if child.name is not None:
+                walk(child, loose)
+            elif loose is not None and type(child) in (NavigableString, CData):
+                _add_loose(loose, child)
+        if id(tag) in wrappers:
+            flush(loose)
+
+    walk(soup, None)
+    soup.decompose()
+    return title or "", blocks
 
 # Helper function to extract text from EPUB files
 def extract_text_from_epub(epub_path):
     """Extract text content from an EPUB file with preserved paragraph formatting."""
     book = epub.read_epub(epub_path)
-    chapter_items = []
     chapters = []
     
     # Get book title for filtering
     title = book.get_metadata('DC', 'title')
     title_text = title[0][0] if title else ""
     
-    # Words that indicate non-content sections
-    non_content_indicators = ['cover', 'title page', 'copyright', 'contents', 'table of contents', 
-                             'endorsements', 'dedication', 'acknowledgments', 'back cover', 'back ads']
+    # Parse the documents on a thread pool (lxml parses with the GIL
+    # released); map() yields them back in their original order
+    contents = [item.get_content() for item in book.get_items()
+                if item.get_type() == ebooklib.ITEM_DOCUMENT]
+    with ThreadPoolExecutor(max_workers=min(OCR_WORKERS, len(contents) or 1)) as pool:
+        parsed = list(pool.map(chapter_blocks, contents))
     
-    # First collect all items in their original order to maintain proper sequence
-    for item in book.get_items():
-        if item.get_type() == ebooklib.ITEM_DOCUMENT:
-            # Parse HTML content
-            soup = BeautifulSoup(item.get_content(), 'html.parser')
-            
-            # Try to identify chapter title/heading
-            chapter_title = ""
-            heading = soup.find(['h1', 'h2', 'h3'])
-            if heading:
-                chapter_title = heading.get_text(strip=True).lower()
-            
-            # Skip non-content sections based on title
-            if any(indicator in chapter_title.lower() for indicator in non_content_indicators):
-                continue
-                
-            # Store the item for processing in order
-            chapter_items.append((item, soup, chapter_title))
-    
-    # Now process each chapter in the correct order
-    for item, soup, chapter_title in chapter_items:
-        # Process paragraphs to preserve formatting
-        paragraphs = []
-        
-        # First handle headings separately to make them stand out
-        headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-        for heading in headings:
-            text = heading.get_text(' ', strip=True)
-            if text.strip():
-                # Add extra newlines around headings
-                paragraphs.append(text)
-                # Add an empty line after heading
-                paragraphs.append('')
-        
-        # Then handle paragraphs
-        for p in soup.find_all(['p', 'div']):
-            text = p.get_text(' ', strip=True)
-            if text.strip():
-                paragraphs.append(text)
+    for chapter_title, blocks in parsed:
+        # Skip non-content sections based on title
+        if _NON_CONTENT_RE.search(chapter_title):
+            continue
         
-        # Join paragraphs with double newlines to preserve paragraph breaks
-        # and filter out any consecutive empty lines
-        filtered_paragraphs = []
-        prev_empty = False
-        for p in paragraphs:
-            if not p.strip():
-                if not prev_empty:  # Only add one empty line at a time
-                    filtered_paragraphs.append(p)
-                prev_empty = True
-            else:
-                filtered_paragraphs.append(p)
-                prev_empty = False
+        # Emit paragraphs straight into the chapter's lines; headings get an
+        # empty line after them so they stand out. Every empty line follows
+        # a non-empty one, so there are no runs of them to filter out
+        lines = []
+        for is_heading, text in blocks:
+            if text:
+                lines.append(text)
+                if is_heading:
+                    lines.append('')
         
-        chapter_text = '\n'.join(filtered_paragraphs)
+        chapter_text = '\n'.join(lines)
         if chapter_text.strip():
             chapters.append(chapter_text)
     
     return chapters
 
+def extract_text_from_epub_cached(epub_path):
+    """extract_text_from_epub() memoised on disk by file content, so re-uploads skip parsing."""
+    h = hashlib.blake2b(Path(epub_path).read_bytes(), digest_size=16)
+    h.update(str(EPUB_CACHE_VERSION).encode())
+    cache_file = EPUB_CACHE / f"speechify_{h.hexdigest()}.json"
+    if cache_file.exists():
+        return json.loads(cache_file.read_text(encoding="utf-8"))
+    chapters = extract_text_from_epub(epub_path)
+    cache_file.write_text(json.dumps(chapters), encoding="utf-8")
+    return chapters
+
+def _process_one_image(filepath, book_name, i):
+    """Deskew, split and OCR one saved page image. Returns its text-file dicts."""
+    bgr = load_image(filepath)
+    if bgr is None:
+        return []
+        
+    thr = auto_rotate_deskew(bgr)
+    parts = maybe_split_two_pages(thr)
+    
+    text_files = []
+    for part_i, part in enumerate(parts):
+        page_id = f"{book_name}_p{i+1:04d}_{part_i+1}"
+        work_img = WORK / f"{page_id}.png"
+        cv2.imwrite(str(work_img), part, WORK_PNG_PARAMS)
+        
+        txt = ocr_ndarray(part)
+        if txt:
+            text_file = TEXT_DIR / f"{page_id}.txt"
+            text_file.write_text(txt, encoding="utf-8")
+            text_files.append({
+                'id': page_id,
+                'filename': text_file.name,
+                'text': txt
+            })
+    return text_files
+
 def process_images_to_text(image_files, book_name):
     """Process uploaded images to extract text."""
-    text_files = []
-    
+    # Save all uploaded files first, keeping their upload index for the page ids
+    saved = []
     for i, file in enumerate(image_files):
         if file.filename == '':
             continue
             
-        # Save uploaded file
         filename = secure_filename(f"{book_name}_page_{i+1:04d}.jpg")
         filepath = INBOX / filename
-        file.save(str(filepath))
-        
-        # Process image
-        bgr = cv2.imread(str(filepath))
-        if bgr is None:
-            continue
-            
-        thr = auto_rotate_deskew(bgr)
-        parts = maybe_split_two_pages(thr)
-        
-        for part_i, part in enumerate(parts):
-            page_id = f"{book_name}_p{i+1:04d}_{part_i+1}"
-            work_img = WORK / f"{page_id}.png"
-            cv2.imwrite(str(work_img), part)
-            
-            txt = ocr_ndarray(part)
-            if txt:
-                text_file = TEXT_DIR / f"{page_id}.txt"
-                text_file.write_text(txt, encoding="utf-8")
-                text_files.append({
-                    'id': page_id,
-                    'filename': text_file.name,
-                    'text': txt
-                })
+        file.save(filepath, buffer_size=UPLOAD_COPY_BUFFER)
+        saved.append((filepath, i))
+    
+    if not saved:
+        return []
+    
+    # OCR the pages on a worker pool; map() yields results in page order
+    text_files = []
+    with ThreadPoolExecutor(max_workers=min(OCR_WORKERS, len(saved))) as pool:
+        for page_files in pool.map(_process_one_image, [p for p, _ in saved],
+                                   [book_name] * len(saved), [i for _, i in saved]):
+            text_files.extend(page_files)
     
     return text_files
 
@@ -152,10 +284,10 @@ def process_epub_to_text(epub_file, book_name):
     # Save uploaded file
     filename = secure_filename(f"{book_name}.epub")
     filepath = INBOX / filename
-    epub_file.save(str(filepath))
+    epub_file.save(filepath, buffer_size=UPLOAD_COPY_BUFFER)
     
     # Extract text from EPUB
-    chapters = extract_text_from_epub(filepath)
+    chapters = extract_text_from_epub_cached(filepath)
     
     text_files = []
     for i, chapter_text in enumerate(chapters):
@@ -170,19 +302,44 @@ def process_epub_to_text(epub_file, book_name):
     
     return text_files
 
+def clean_book_name(name):
+    """Book name safe for file naming: 'My Book: Vol 2' -> 'My_Book_Vol_2'.
+
+    Existing books' files are named by this, so keep the output stable.
+    """
+    name = _BOOK_NAME_DROP_RE.sub('', name.strip()).strip()
+    return _BOOK_NAME_SEP_RE.sub('_', name) or 'untitled'
+
+_book_data_cache = {}  # book name -> (mtime_ns, parsed book_data)
+
+def load_book_data(book_name):
+    """Parsed {book}_book_data.json, or None if there is no such book.
+
+    Kept in memory and only re-read when the file's mtime changes; callers
+    must not modify the returned dict.
+    """
+    book_file = TEXT_DIR / f"{book_name}_book_data.json"
+    try:
+        mtime = book_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _book_data_cache.get(book_name)
+    if cached is None or cached[0] != mtime:
+        cached = _book_data_cache[book_name] = (mtime, json_loads(book_file.read_bytes()))
+    return cached[1]
+
+def _page_text(page):
+    """Current text of a book_data page, read from its .txt file."""
+    return (TEXT_DIR / page['filename']).read_text(encoding="utf-8")
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/upload', methods=['POST'])
 def upload():
-    book_name = request.form.get('book_name', 'untitled').strip()
-    if not book_name:
-        book_name = 'untitled'
-    
     # Clean book name for file naming
-    book_name = re.sub(r'[^\w\s-]', '', book_name).strip()
-    book_name = re.sub(r'[-\s]+', '_', book_name)
+    book_name = clean_book_name(request.form.get('book_name', 'untitled'))
     
     text_files = []
     
@@ -201,17 +358,19 @@ def upload():
     if not text_files:
         return jsonify({'error': 'No valid files uploaded'}), 400
     
-    # Store book info in session or temporary storage
+    # Store book info in session or temporary storage. Page text lives only
+    # in each page's .txt file, so saving a page doesn't rewrite the book
     book_data = {
         'name': book_name,
-        'pages': text_files,
+        'pages': [{'id': f['id'], 'filename': f['filename']} for f in text_files],
         'current_page': 0
     }
     
     # For simplicity, we'll store this in a temporary file
     # In production, you'd use a proper database or session management
     book_file = TEXT_DIR / f"{book_name}_book_data.json"
-    book_file.write_text(json.dumps(book_data), encoding="utf-8")
+    book_file.write_bytes(json_dumps(book_data))
+    _book_data_cache.pop(book_name, None)
     
     return jsonify({
         'success': True,
@@ -222,21 +381,19 @@ def upload():
 
 @app.route('/editor/<book_name>')
 def editor(book_name):
-    book_file = TEXT_DIR / f"{book_name}_book_data.json"
-    if not book_file.exists():
+    book_data = load_book_data(book_name)
+    if book_data is None:
         return redirect(url_for('index'))
     
-    book_data = json.loads(book_file.read_text(encoding="utf-8"))
+    book_data = dict(book_data, pages=[dict(page, text=_page_text(page)) for page in book_data['pages']])
     return render_template('editor.html', book_data=book_data)
 
 @app.route('/api/page/<book_name>/<int:page_num>')
 def get_page(book_name, page_num):
-    book_file = TEXT_DIR / f"{book_name}_book_data.json"
-    if not book_file.exists():
+    book_data = load_book_data(book_name)
+    if book_data is None:
         return jsonify({'error': 'Book not found'}), 404
     
-    book_data = json.loads(book_file.read_text(encoding="utf-8"))
-    
     if page_num < 0 or page_num >= len(book_data['pages']):
         return jsonify({'error': 'Page not found'}), 404
     
@@ -244,7 +401,7 @@ def get_page(book_name, page_num):
     return jsonify({
         'page_num': page_num,
         'total_pages': len(book_data['pages']),
-        'text': page_data['text'],
+        'text': _page_text(page_data),
         'page_id': page_data['id']
     })
 
@@ -253,40 +410,29 @@ def save_page(book_name, page_num):
     data = request.get_json()
     new_text = data.get('text', '')
     
-    book_file = TEXT_DIR / f"{book_name}_book_data.json"
-    if not book_file.exists():
+    book_data = load_book_data(book_name)
+    if book_data is None:
         return jsonify({'error': 'Book not found'}), 404
     
-    book_data = json.loads(book_file.read_text(encoding="utf-8"))
-    
     if page_num < 0 or page_num >= len(book_data['pages']):
         return jsonify({'error': 'Page not found'}), 404
     
-    # Update text in book data
-    book_data['pages'][page_num]['text'] = new_text
-    
-    # Save updated book data
-    book_file.write_text(json.dumps(book_data), encoding="utf-8")
-    
-    # Also save to individual text file
-    page_id = book_data['pages'][page_num]['id']
-    text_file = TEXT_DIR / f"{page_id}.txt"
+    # Save to the page's text file; book_data itself doesn't change
+    text_file = TEXT_DIR / book_data['pages'][page_num]['filename']
     text_file.write_text(new_text, encoding="utf-8")
     
     return jsonify({'success': True})
 
 @app.route('/api/preview/<book_name>/<int:page_num>')
 def preview_audio(book_name, page_num):
-    book_file = TEXT_DIR / f"{book_name}_book_data.json"
-    if not book_file.exists():
+    book_data = load_book_data(book_name)
+    if book_data is None:
         return jsonify({'error': 'Book not found'}), 404
     
-    book_data = json.loads(book_file.read_text(encoding="utf-8"))
-    
     if page_num < 0 or page_num >= len(book_data['pages']):
         return jsonify({'error': 'Page not found'}), 404
     
-    text = book_data['pages'][page_num]['text']
+    text = _page_text(book_data['pages'][page_num])
     if not text.strip():
         return jsonify({'error': 'No text to convert'}), 400
     
@@ -303,37 +449,58 @@ def preview_audio(book_name, page_num):
 
 @app.route('/api/generate/<book_name>')
 def generate_full_audio(book_name):
-    book_file = TEXT_DIR / f"{book_name}_book_data.json"
-    if not book_file.exists():
+    book_data = load_book_data(book_name)
+    if book_data is None:
         return jsonify({'error': 'Book not found'}), 404
     
-    book_data = json.loads(book_file.read_text(encoding="utf-8"))
-    
-    mp3_paths = []
-    
-    for i, page in enumerate(book_data['pages']):
-        text = page['text']
-        if text.strip():
-            mp3_path = OUT / f"{book_name}_p{i+1:04d}.mp3"
-            if speechify_tts_to_mp3(text, mp3_path):
-                mp3_paths.append(mp3_path)
-    
-    if mp3_paths:
-        # Combine all MP3s
+    # The requests are network-bound, so run TTS_WORKERS of them at once
+    # (speechify_tts_to_mp3 retries 429s/5xx itself)
+    texts = [_page_text(page) for page in book_data['pages']]
+    jobs = [(text, OUT / f"{book_name}_p{i+1:04d}.mp3")
+            for i, text in enumerate(texts) if text.strip()]
+    
+    def event(data):
+        return f"data: {json.dumps(data)}\n\n"
+    
+    def generate():
+        # Report progress as Server-Sent Events while the pages are synthesized,
+        # then send the combined URL (or the error) as the last event
+        with ThreadPoolExecutor(max_workers=TTS_WORKERS) as pool:
+            futs = [pool.submit(speechify_tts_to_mp3, *job) for job in jobs]
+            for done, _ in enumerate(as_completed(futs), 1):
+                yield event({'page': done, 'total': len(jobs)})
+        # Combine in submission order, not completion order
+        mp3_paths = [mp3_path for (_, mp3_path), fut in zip(jobs, futs) if fut.result()]
+        
+        if not mp3_paths:
+            yield event({'error': 'No audio generated'})
+            return
+        
+        # Combine all MP3s. The 200 and the progress events are already out,
+        # so a failure here has to reach the client as the final event
         combined_path = OUT / f"{book_name}_combined.mp3"
-        combine_mp3s(mp3_paths, combined_path)
+        try:
+            combine_mp3s(mp3_paths, combined_path)
+        except Exception as e:
+            yield event({'error': f'Combining audio failed: {e}'})
+            return
         
-        return jsonify({
+        yield event({
             'success': True,
             'audio_url': url_for('download_audio', filename=combined_path.name),
             'total_pages': len(mp3_paths)
         })
-    else:
-        return jsonify({'error': 'No audio generated'}), 500
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/download/<filename>')
 def download_audio(filename):
-    return send_from_directory(OUT, filename, as_attachment=True)
+    # conditional=True sends an ETag/Last-Modified and answers Range requests,
+    # so repeat downloads get a 304 and players can seek. No max_age: previews
+    # and the combined book are regenerated under the same names, so browsers
+    # must revalidate rather than replay a cached copy.
+    return send_from_directory(OUT, filename, as_attachment=True, conditional=True)
 
 @app.route('/api/text-tools', methods=['POST'])
 def text_tools():
@@ -342,40 +509,53 @@ def text_tools():
     tool = data.get('tool', '')
     
     if tool == 'capitalize':
-        # Capitalize first letter of each sentence
-        import re
-        sentences = re.split(r'([.!?]+)', text)
-        result = ''
+        # Capitalize first letter of each sentence; collect the pieces in a
+        # list and join once instead of growing a string with +=
+        sentences = _SENTENCE_END_RE.split(text)
+        result = []
         for i in range(0, len(sentences), 2):
-            if i < len(sentences):
-                sentence = sentences[i].strip()
-                if sentence:
-                    result += sentence[0].upper() + sentence[1:] + ' '
-                if i + 1 < len(sentences):
-                    result += sentences[i + 1] + ' '
-        text = result.strip()
+            sentence = sentences[i].strip()
+            if sentence:
+                result.append(sentence[0].upper() + sentence[1:])
+            if i + 1 < len(sentences):
+                result.append(sentences[i + 1])
+        text = ' '.join(result)
     
     elif tool == 'fix_spaces':
         # Fix multiple spaces and spacing around punctuation
-        import re
-        text = re.sub(r'\s+', ' ', text)  # Multiple spaces to single
-        text = re.sub(r'\s+([.,!?;:])', r'\1', text)  # Remove spaces before punctuation
-        text = re.sub(r'([.,!?;:])\s*([a-zA-Z])', r'\1 \2', text)  # Add space after punctuation
+        text = _MULTISPACE_RE.sub(' ', text)  # Multiple spaces to single
+        text = _SPACE_BEFORE_PUNCT_RE.sub(r'\1', text)  # Remove spaces before punctuation
+        text = _PUNCT_SPACE_RE.sub(r'\1 \2', text)  # Add space after punctuation
     
     elif tool == 'fix_hyphenation':
         # Fix common hyphenation issues
-        import re
-        text = re.sub(r'(\w+)-\s*\n\s*(\w+)', r'\1\2', text)  # Remove hyphens at line breaks
-        text = re.sub(r'\s+', ' ', text)  # Clean up extra spaces
+        text = _HYPHEN_WRAP_RE.sub(r'\1\2', text)  # Remove hyphens at line breaks
+        text = _MULTISPACE_RE.sub(' ', text)  # Clean up extra spaces
     
     elif tool == 'remove_line_breaks':
         # Remove line breaks within paragraphs
-        import re
-        text = re.sub(r'\n\s*\n', '\n\n', text)  # Preserve paragraph breaks
-        text = re.sub(r'(?<!\n)\n(?!\n)', ' ', text)  # Remove single line breaks
-        text = re.sub(r'\s+', ' ', text)  # Clean up extra spaces
+        text = _PARA_BREAK_RE.sub('\n\n', text)  # Preserve paragraph breaks
+        text = _SINGLE_NL_RE.sub(' ', text)  # Remove single line breaks
+        text = _MULTISPACE_RE.sub(' ', text)  # Clean up extra spaces
     
     return jsonify({'text': text})
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    import argparse
+    
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description='BookAudio Web UI (Speechify)')
+    parser.add_argument('--port', type=int, default=5000, help='Port to run the server on')
+    parser.add_argument('--host', type=str, default='0.0.0.0', help='Host to run the server on')
+    parser.add_argument('--threads', type=int, default=8, help='Request threads (OCR/TTS calls block one each)')
+    parser.add_argument('--debug', action='store_true', help='Use the Flask dev server with reloader and debugger')
+    args = parser.parse_args()
+    
+    # Run the app on a multi-threaded server, so a preview or a streaming
+    # full-book generation only ties up its own thread
+    if args.debug:
+        app.run(debug=True, host=args.host, port=args.port)
+    elif serve is not None:
+        serve(app, host=args.host, port=args.port, threads=args.threads)
+    else:
+        app.run(host=args.host, port=args.port, threaded=True) 
\ No newline at end of file
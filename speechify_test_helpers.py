@@ -0,0 +1,5 @@
+"""Helpers shared by test_speechify.py and test_speechify_basic.py."""
+
+def b64len(data):
+    """Size of the bytes a base64 string decodes to, without decoding it."""
+    return len(data) * 3 // 4 - (len(data) - len(data.rstrip("=")))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the Speechify web UI's text handling (no API key needed).
+"""
+
+import re
+import random
+import pytest
+
+import bookaudio_web_speechify as web
+
+@pytest.fixture(params=["lxml", "bs4"])
+def parser(request, monkeypatch):
+    """Run each test through lxml and through the BeautifulSoup fallback."""
+    if request.param == "lxml" and web.etree is None:
+        pytest.skip("lxml not installed")
+    if request.param == "bs4":
+        monkeypatch.setattr(web, "etree", None)
+    return request.param
+
+def test_heading_wrapper_keeps_its_loose_text(parser):
+    title, blocks = web.chapter_blocks(b'<div><h2>Title</h2>Loose text.<br/>More.</div>')
+    assert title == "title"
+    assert blocks == [(True, "Title"), (False, "Loose text. More.")]
+
+def test_heading_wrapper_text_stays_in_document_order(parser):
+    content = b'<div>Lead <em>in</em><h2>T</h2>tail <b>x</b> end<p>para</p>after</div>'
+    assert web.chapter_blocks(content)[1] == [
+        (False, "Lead in"), (True, "T"), (False, "tail x end"), (False, "para"), (False, "after"),
+    ]
+
+def test_nested_divs_without_heading_are_all_kept(parser):
+    content = b'<html><body><div><div><p>a</p></div><p>b</p></div></body></html>'
+    assert web.chapter_blocks(content) == (
+        "", [(False, "a b"), (False, "a"), (False, "a"), (False, "b")]
+    )
+
+def _original_book_name(name):
+    """The upload route's book-name cleanup before clean_book_name existed."""
+    name = name.strip() or 'untitled'
+    name = re.sub(r'[^\w\s-]', '', name).strip()
+    return re.sub(r'[-\s]+', '_', name)
+
+@pytest.mark.parametrize("name, expected", [
+    ("My Book: Vol 2", "My_Book_Vol_2"),
+    ("My Book -", "My_Book_"),
+    ("B-_-", "B___"),
+    ("-lead", "_lead"),
+    ("  spaced   out  ", "spaced_out"),
+    ("Café au lait", "Café_au_lait"),
+    ("", "untitled"),
+    ("   ", "untitled"),
+])
+def test_clean_book_name(name, expected):
+    assert web.clean_book_name(name) == expected
+
+def test_clean_book_name_matches_original():
+    rng = random.Random(0)
+    alphabet = "ab_-  \t:!.é9"
+    for _ in range(5000):
+        name = "".join(rng.choice(alphabet) for _ in range(rng.randrange(12)))
+        expected = _original_book_name(name) or "untitled"
+        assert web.clean_book_name(name) == expected, name
@@ -6,74 +6,119 @@ Tests all aspects of the TTS functionality and ensures backwards compatibility.
 
 import os
 import sys
-import base64
+import json
+import hashlib
+import httpx
 import pytest
-from pathlib import Path
-import tempfile
-import shutil
+from concurrent.futures import ThreadPoolExecutor
 
-# Try to import speechify
+# Skip the whole module rather than installing the SDK from under the test run
 try:
     from speechify import Speechify
-    from speechify.tts import GetSpeechOptionsRequest
-    print("✅ Speechify SDK imported successfully")
+    from speechify.tts import GetSpeechResponse
+    from speechify.tts.audio.client import AudioClient
 except ImportError:
-    print("❌ Speechify SDK not installed. Installing...")
-    os.system("pip install speechify-api")
-    try:
-        from speechify import Speechify
-        from speechify.tts import GetSpeechOptionsRequest
-        print("✅ Speechify SDK installed and imported successfully")
-    except ImportError:
-        print("❌ Failed to install Speechify SDK. Please install manually: pip install speechify-api")
-        sys.exit(1)
+    pytest.skip("speechify-api not installed (pip install speechify-api)", allow_module_level=True)
 
 # Import the functions we're testing
 from book_reader_speechify_manual import speechify_tts_to_mp3, combine_mp3s
+from speechify_test_helpers import b64len
+
+# Every test here calls the Speechify API; with pytest-xdist, `pytest -n auto -m network`
+# spreads them over workers (session fixtures are then built once per worker).
+# Without a key the whole module is skipped up front.
+pytestmark = [
+    pytest.mark.network,
+    pytest.mark.skipif(not os.getenv("SPEECHIFY_API_KEY"),
+                       reason="SPEECHIFY_API_KEY environment variable not set"),
+]
+
+@pytest.fixture(scope="session")
+def speechify_client():
+    """One Speechify client for the whole run, keeping its connections alive between tests."""
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0)
+    # Closed (with its connection pool) once the session is over
+    with httpx.Client(limits=limits) as http:
+        # A custom httpx client disables the SDK's default timeout, so set it again
+        yield Speechify(token=os.getenv("SPEECHIFY_API_KEY"), timeout=60, httpx_client=http)
+
+@pytest.fixture(scope="session", autouse=True)
+def tts_cache(request):
+    """With TTS_TEST_CACHE=1, replay speech responses saved in pytest's cache dir.
+
+    Patches the SDK method so both the shared client and the one behind
+    speechify_tts_to_mp3 are covered; only successful responses are stored.
+    """
+    if os.getenv("TTS_TEST_CACHE") != "1":
+        yield None
+        return
+    cache_dir = request.config.cache.mkdir("speechify_tts")
+    speech = AudioClient.speech
+
+    def cached_speech(self, **kwargs):
+        key = {k: v.model_dump() if hasattr(v, "model_dump") else v
+               for k, v in kwargs.items() if k != "request_options"}
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+        path = cache_dir / f"{digest}.json"
+        if path.exists():
+            return GetSpeechResponse.model_validate_json(path.read_bytes())
+        response = speech(self, **kwargs)
+        # Write then rename so concurrent requests never read a partial entry
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{id(response)}")
+        tmp.write_text(response.model_dump_json(), encoding="utf-8")
+        os.replace(tmp, path)
+        return response
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(AudioClient, "speech", cached_speech)
+        yield cache_dir
+
+@pytest.fixture(scope="session")
+def voice_list(speechify_client):
+    """The account's voices, listed once per run."""
+    return speechify_client.tts.voices.list()
+
+@pytest.fixture(scope="session")
+def scott_voice(voice_list):
+    """The first voice offering the default 'scott' model, or None."""
+    return next((v for v in voice_list for m in v.models if m.name == "scott"), None)
+
+@pytest.fixture(scope="session")
+def voice_index(voice_list):
+    """Voice positions bucketed by gender, locale and tag, plus each voice's model names.
+
+    Built in one walk over the voices, so filtering is set intersection
+    instead of a rescan of every voice, model and language per query.
+    """
+    index = {"gender": {}, "locale": {}, "tag": {}, "models": []}
+    for i, voice in enumerate(voice_list):
+        models = voice.models or ()
+        index["gender"].setdefault((voice.gender or "").lower(), set()).add(i)
+        for locale in {lang.locale for model in models for lang in model.languages or ()}:
+            index["locale"].setdefault(locale, set()).add(i)
+        for tag in voice.tags or ():
+            index["tag"].setdefault(tag, set()).add(i)
+        index["models"].append(tuple(model.name for model in models))
+    return index
 
 class TestSpeechifyMigration:
     """Test suite for Speechify API migration."""
     
     @pytest.fixture(autouse=True)
-    def setup(self):
+    def setup(self, tmp_path):
         """Setup test environment."""
-        self.api_key = os.getenv("SPEECHIFY_API_KEY")
-        if not self.api_key:
-            pytest.skip("SPEECHIFY_API_KEY environment variable not set")
-        
-        # Create temporary directory for test outputs
-        self.test_dir = Path(tempfile.mkdtemp())
+        # pytest's per-test temporary directory for test outputs, cleaned up for us
+        self.test_dir = tmp_path
         self.test_output = self.test_dir / "test_output.mp3"
-        
-        yield
-        
-        # Cleanup
-        shutil.rmtree(self.test_dir)
     
-    def test_api_connection(self):
+    def test_api_connection(self, voice_list):
         """Test basic API connection and authentication."""
-        client = Speechify(token=self.api_key)
-        
         # Test by listing voices
-        voice_list = client.tts.voices.list()
         assert len(voice_list) > 0, "Should be able to list voices"
         print(f"✅ API connection successful! Found {len(voice_list)} voices")
     
-    def test_default_voice_availability(self):
+    def test_default_voice_availability(self, scott_voice):
         """Test that the default voice 'scott' is available."""
-        client = Speechify(token=self.api_key)
-        voice_list = client.tts.voices.list()
-        
-        # Check if 'scott' voice is available
-        scott_voice = None
-        for voice in voice_list:
-            for model in voice.models:
-                if model.name == "scott":
-                    scott_voice = voice
-                    break
-            if scott_voice:
-                break
-        
         assert scott_voice is not None, "Default voice 'scott' should be available"
         print(f"✅ Default voice 'scott' is available")
     
@@ -128,10 +173,10 @@ class TestSpeechifyMigration:
         
         print("✅ Special characters test passed")
     
-    def test_multilingual_support(self):
+    def test_multilingual_support(self, speechify_client):
         """Test multilingual model support."""
         # Test with simba-multilingual model
-        client = Speechify(token=self.api_key)
+        client = speechify_client
         
         # Test English text
         english_text = "Hello, this is a test in English."
@@ -159,95 +204,81 @@ class TestSpeechifyMigration:
         
         print("✅ Multilingual support test passed")
     
-    def test_audio_formats(self):
+    def test_audio_formats(self, speechify_client):
         """Test different audio format support."""
-        client = Speechify(token=self.api_key)
+        client = speechify_client
         test_text = "Testing different audio formats."
         
         formats = ["mp3", "wav", "aac", "ogg"]
         
-        for audio_format in formats:
-            audio_response = client.tts.audio.speech(
+        def synthesize(audio_format):
+            return client.tts.audio.speech(
                 audio_format=audio_format,
                 input=test_text,
                 language="en-US",
                 model="simba-english",
                 voice_id="scott"
             )
-            
+        
+        # Request all formats at once over the shared client's connection pool
+        with ThreadPoolExecutor(max_workers=len(formats)) as pool:
+            responses = list(pool.map(synthesize, formats))
+        
+        for audio_format, audio_response in zip(formats, responses):
             assert audio_response.audio_data, f"Should get audio data for {audio_format} format"
             assert audio_response.audio_format == audio_format, f"Response format should match {audio_format}"
             
-            # Decode and verify it's valid audio data
-            audio_bytes = base64.b64decode(audio_response.audio_data)
-            assert len(audio_bytes) > 100, f"Audio data should have reasonable size for {audio_format}"
+            # Check the decoded size straight from the base64 length
+            assert b64len(audio_response.audio_data) > 100, f"Audio data should have reasonable size for {audio_format}"
         
         print("✅ Audio formats test passed")
     
-    def test_voice_filtering(self):
+    def test_voice_filtering(self, voice_index):
         """Test voice filtering functionality."""
-        client = Speechify(token=self.api_key)
-        voice_list = client.tts.voices.list()
-        
-        def filter_voice_models(voices, *, gender=None, locale=None, tags=None):
+        def filter_voice_models(index, *, gender=None, locale=None, tags=None):
             """
             Filter Speechify voices by gender, locale, and/or tags,
             and return the list of model IDs for matching voices.
             """
-            results = []
+            matches = set(range(len(index["models"])))
+            if gender:
+                matches &= index["gender"].get(gender.lower(), set())
+            if locale:
+                matches &= index["locale"].get(locale, set())
+            for tag in tags or ():
+                matches &= index["tag"].get(tag, set())
             
-            for voice in voices:
-                # gender filter
-                if gender and voice.gender.lower() != gender.lower():
-                    continue
-                
-                # locale filter (check across models and languages)
-                if locale:
-                    if not any(
-                        any(lang.locale == locale for lang in model.languages)
-                        for model in voice.models
-                    ):
-                        continue
-                
-                # tags filter
-                if tags:
-                    if not all(tag in voice.tags for tag in tags):
-                        continue
-                
-                # If we got here, the voice matches -> collect model ids
-                for model in voice.models:
-                    results.append(model.name)
-            
-            return results
+            # Collect the matching voices' model ids, in voice order
+            return [name for i in sorted(matches) for name in index["models"][i]]
         
         # Test filtering by gender
-        male_voices = filter_voice_models(voice_list, gender="male")
-        female_voices = filter_voice_models(voice_list, gender="female")
+        male_voices = filter_voice_models(voice_index, gender="male")
+        female_voices = filter_voice_models(voice_index, gender="female")
         
         assert len(male_voices) > 0, "Should find male voices"
         assert len(female_voices) > 0, "Should find female voices"
         
         # Test filtering by locale
-        en_us_voices = filter_voice_models(voice_list, locale="en-US")
+        en_us_voices = filter_voice_models(voice_index, locale="en-US")
         assert len(en_us_voices) > 0, "Should find en-US voices"
         
         print("✅ Voice filtering test passed")
     
     def test_mp3_combination(self):
         """Test MP3 file combination functionality."""
-        # Create multiple test audio files
-        test_files = []
+        # Create multiple test audio files, synthesizing them concurrently
         test_texts = [
             "First audio segment for testing.",
             "Second audio segment for testing.",
             "Third audio segment for testing."
         ]
+        test_files = [self.test_dir / f"test_{i}.mp3" for i in range(len(test_texts))]
+        
+        with ThreadPoolExecutor(max_workers=len(test_texts)) as pool:
+            results = list(pool.map(speechify_tts_to_mp3, test_texts, test_files))
         
-        for i, text in enumerate(test_texts):
-            test_file = self.test_dir / f"test_{i}.mp3"
-            success = speechify_tts_to_mp3(text, test_file)
+        for i, success in enumerate(results):
             assert success, f"Should create test file {i}"
-            test_files.append(test_file)
         
         # Combine the files
         combined_file = self.test_dir / "combined.mp3"
@@ -289,32 +320,22 @@ class TestSpeechifyMigration:
     def test_performance(self):
         """Test performance with multiple concurrent requests."""
         import time
-        import threading
         
         test_text = "Performance test text."
-        results = []
         
-        def generate_audio(thread_id):
-            output_file = self.test_dir / f"perf_test_{thread_id}.mp3"
-            start_time = time.time()
+        def generate_audio(request_id):
+            output_file = self.test_dir / f"perf_test_{request_id}.mp3"
+            start_time = time.perf_counter()
             success = speechify_tts_to_mp3(test_text, output_file)
-            end_time = time.time()
-            results.append({
-                'thread_id': thread_id,
+            return {
+                'request_id': request_id,
                 'success': success,
-                'duration': end_time - start_time
-            })
-        
-        # Run multiple threads
-        threads = []
-        for i in range(3):
-            thread = threading.Thread(target=generate_audio, args=(i,))
-            threads.append(thread)
-            thread.start()
+                'duration': time.perf_counter() - start_time
+            }
         
-        # Wait for all threads to complete
-        for thread in threads:
-            thread.join()
+        # Run the requests concurrently; speechify_tts_to_mp3 shares one client across them
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(generate_audio, range(3)))
         
         # Check results
         successful_requests = sum(1 for r in results if r['success'])
@@ -323,64 +344,37 @@ class TestSpeechifyMigration:
         avg_duration = sum(r['duration'] for r in results) / len(results)
         print(f"✅ Performance test passed - Average duration: {avg_duration:.2f}s")
 
-def test_voice_availability():
+def test_voice_availability(scott_voice):
     """Test that required voices are available."""
-    api_key = os.getenv("SPEECHIFY_API_KEY")
-    if not api_key:
-        pytest.skip("SPEECHIFY_API_KEY environment variable not set")
-    
-    client = Speechify(token=api_key)
-    voice_list = client.tts.voices.list()
-    
-    # Check for scott voice
-    scott_found = False
-    for voice in voice_list:
-        for model in voice.models:
-            if model.name == "scott":
-                scott_found = True
-                break
-        if scott_found:
-            break
-    
-    assert scott_found, "Default voice 'scott' should be available"
+    assert scott_voice is not None, "Default voice 'scott' should be available"
     print("✅ Voice availability test passed")
 
-def test_model_availability():
+def test_model_availability(speechify_client):
     """Test that required models are available."""
-    api_key = os.getenv("SPEECHIFY_API_KEY")
-    if not api_key:
-        pytest.skip("SPEECHIFY_API_KEY environment variable not set")
+    client = speechify_client
     
-    client = Speechify(token=api_key)
-    
-    # Test both models
+    # Test both models, requesting them at once
     test_text = "Testing model availability."
+    models = ["simba-english", "simba-multilingual"]
     
-    # Test simba-english
-    try:
-        audio_response = client.tts.audio.speech(
+    def synthesize(model):
+        return client.tts.audio.speech(
             audio_format="mp3",
             input=test_text,
             language="en-US",
-            model="simba-english",
+            model=model,
             voice_id="scott"
         )
-        assert audio_response.audio_data, "simba-english model should work"
-    except Exception as e:
-        pytest.fail(f"simba-english model failed: {e}")
     
-    # Test simba-multilingual
-    try:
-        audio_response = client.tts.audio.speech(
-            audio_format="mp3",
-            input=test_text,
-            language="en-US",
-            model="simba-multilingual",
-            voice_id="scott"
-        )
-        assert audio_response.audio_data, "simba-multilingual model should work"
-    except Exception as e:
-        pytest.fail(f"simba-multilingual model failed: {e}")
+    with ThreadPoolExecutor(max_workers=len(models)) as pool:
+        futures = [pool.submit(synthesize, model) for model in models]
+    
+    for model, future in zip(models, futures):
+        try:
+            audio_response = future.result()
+            assert audio_response.audio_data, f"{model} model should work"
+        except Exception as e:
+            pytest.fail(f"{model} model failed: {e}")
     
     print("✅ Model availability test passed")
 
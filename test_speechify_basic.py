@@ -8,7 +8,9 @@ import os
 import sys
 import base64
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import tempfile
+from speechify_test_helpers import b64len
 
 def test_speechify_installation():
     """Test that Speechify SDK is properly installed."""
@@ -99,17 +101,10 @@ def test_voice_availability(api_key):
         voice_list = client.tts.voices.list()
         
         # Check for scott voice
-        scott_found = False
-        for voice in voice_list:
-            for model in voice.models:
-                if model.name == "scott":
-                    scott_found = True
-                    print(f"✅ Found voice: {voice.name} (ID: scott)")
-                    break
-            if scott_found:
-                break
-        
-        if not scott_found:
+        scott = next((v for v in voice_list if any(m.name == "scott" for m in v.models)), None)
+        if scott is not None:
+            print(f"✅ Found voice: {scott.name} (ID: scott)")
+        else:
             print("⚠️  Voice 'scott' not found, but other voices are available:")
             for voice in voice_list[:3]:  # Show first 3 voices
                 print(f"   - {voice.name}")
@@ -127,34 +122,28 @@ def test_model_availability(api_key):
         client = Speechify(token=api_key)
         
         test_text = "Testing model availability."
+        models = ["simba-english", "simba-multilingual"]
         
-        # Test simba-english
-        try:
-            audio_response = client.tts.audio.speech(
+        def synthesize(model):
+            return client.tts.audio.speech(
                 audio_format="mp3",
                 input=test_text,
                 language="en-US",
-                model="simba-english",
+                model=model,
                 voice_id="scott"
             )
-            print("✅ simba-english model works")
-        except Exception as e:
-            print(f"❌ simba-english model failed: {e}")
-            return False
         
-        # Test simba-multilingual
-        try:
-            audio_response = client.tts.audio.speech(
-                audio_format="mp3",
-                input=test_text,
-                language="en-US",
-                model="simba-multilingual",
-                voice_id="scott"
-            )
-            print("✅ simba-multilingual model works")
-        except Exception as e:
-            print(f"❌ simba-multilingual model failed: {e}")
-            return False
+        # Request both models at once, then report them in order
+        with ThreadPoolExecutor(max_workers=len(models)) as pool:
+            futures = [pool.submit(synthesize, model) for model in models]
+        
+        for model, future in zip(models, futures):
+            try:
+                future.result()
+                print(f"✅ {model} model works")
+            except Exception as e:
+                print(f"❌ {model} model failed: {e}")
+                return False
         
         return True
         
@@ -171,18 +160,25 @@ def test_audio_formats(api_key):
         test_text = "Testing different audio formats."
         formats = ["mp3", "wav", "aac", "ogg"]
         
-        for audio_format in formats:
+        def synthesize(audio_format):
+            return client.tts.audio.speech(
+                audio_format=audio_format,
+                input=test_text,
+                language="en-US",
+                model="simba-english",
+                voice_id="scott"
+            )
+        
+        # Request all formats at once, then report them in order
+        with ThreadPoolExecutor(max_workers=len(formats)) as pool:
+            futures = [pool.submit(synthesize, audio_format) for audio_format in formats]
+        
+        for audio_format, future in zip(formats, futures):
             try:
-                audio_response = client.tts.audio.speech(
-                    audio_format=audio_format,
-                    input=test_text,
-                    language="en-US",
-                    model="simba-english",
-                    voice_id="scott"
-                )
+                audio_response = future.result()
                 
-                audio_bytes = base64.b64decode(audio_response.audio_data)
-                print(f"✅ {audio_format} format works ({len(audio_bytes)} bytes)")
+                size = b64len(audio_response.audio_data)
+                print(f"✅ {audio_format} format works ({size} bytes)")
                 
             except Exception as e:
                 print(f"❌ {audio_format} format failed: {e}")